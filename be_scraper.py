@@ -1,18 +1,324 @@
 # Note: Smartsheet library does not work with python3.10
 
-import shutil
+import argparse
+import hashlib
+import io
+import os
+import queue
+import random
+import sqlite3
+import tempfile
+import threading
 import time
-from typing import Union
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, Union
+from urllib.parse import urljoin
 
 import keyring
 import requests
-import selenium.common.exceptions
 import smartsheet
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
+from urllib3.util.retry import Retry
 from webdriver_manager.chrome import ChromeDriverManager
 
+CACHE_FILE = "be_links.sqlite"
+SHEET_ID = 5040109000124292
+PID_COLUMN = 6452170849576836
+DESCRIPTION_COLUMN = 8703970663262084
+IMAGE_COLUMN = 4200371035891588
+ROWS_PAGE_SIZE = 500
+
+# CloudFront page title when it blocks the request
+BLOCKED_TITLE = "ERROR: The request could not be satisfied"
+BLOCKED_STATUS = (403, 429, 503)
+
+# match_link() run inside the page, so Selenium returns only the winning URL in one call.
+# Like WebElement.get_attribute(), the href property is the resolved URL.
+MATCH_LINK_SCRIPT = """
+const [attribute, words] = arguments;
+for (const link of document.getElementsByTagName("a")) {
+    const url = attribute in link ? link[attribute] : link.getAttribute(attribute);
+    if (url && words.every((word) => url.includes(word))) {
+        return url;
+    }
+}
+return null;
+"""
+DOWNLOAD_DIR = os.path.expanduser("~/Desktop/be_pics")
+
+# CloudFront rejects the default python-requests agent outright
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/104.0.0.0 Safari/537.36"
+)
+
+
+class RateLimiter:
+    """Adaptive token bucket spacing out page loads across all workers.
+
+    Starts at one request per `interval` seconds. Each successful page load adds
+    `increase` requests/second up to one per `min_interval`, and each block halves the rate
+    and pauses every worker, with the pause doubling on consecutive blocks (plus jitter).
+    So the scraper settles at the fastest rate the site tolerates. The token count, rate and
+    backoff state are updated under one lock.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        min_interval: float = 0.5,
+        increase: float = 0.02,
+        backoff: float = 30,
+        max_backoff: float = 1800,
+    ):
+        self.rate = 1 / interval
+        self.max_rate = 1 / min_interval
+        self.min_rate = 1 / 600
+        self.increase = increase
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._blocked_at = 0.0
+        self._blocked_until = 0.0
+        self._blocks = 0
+
+    def wait(self) -> float:
+        """Block until a token is available and no backoff is in progress.
+
+        Returns the time the request may start, to pass back to success().
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    1.0, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return now
+                delay = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+
+    def success(self, started: float) -> None:
+        """Additive increase after a page loaded normally.
+
+        Loads that started before the last block are ignored, so a slow request finishing
+        while another worker is blocked does not reset the backoff or raise the rate.
+
+        Args:
+            started [float]: the time returned by wait() for this request
+        """
+        with self._lock:
+            if started < self._blocked_at:
+                return
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self._blocks = 0
+
+    def blocked(self) -> float:
+        """Multiplicative decrease and exponential backoff after a blocked request.
+
+        Returns the seconds until requests resume. Blocks reported by other workers during
+        the same backoff are not counted again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._blocks += 1
+            delay = min(self.max_backoff, self.backoff * 2 ** (self._blocks - 1))
+            delay = random.uniform(delay / 2, delay)
+            self._blocked_at = now
+            self._blocked_until = now + delay
+            self._tokens = 0.0
+            return delay
+
+
+class AnchorParser(HTMLParser):
+    """Streaming HTML parser that matches anchor attributes against a list of words.
+
+    Fed the page in chunks; `match` is set on the first anchor whose attribute contains every
+    word, so the caller can stop reading the response early. Relative URLs are resolved
+    against `base_url`, as the browser does for the Selenium path.
+    """
+
+    def __init__(self, words: list, attribute: str, base_url: str = ""):
+        super().__init__()
+        self.words = words
+        self.attribute = attribute
+        self.base_url = base_url
+        self.match = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.match or tag != "a":
+            return
+        for name, value in attrs:
+            if name == self.attribute:
+                if value:
+                    value = urljoin(self.base_url, value)
+                self.match = match_link([value], self.words)
+                return
+
+
+class LinkCache:
+    """On-disk SQLite cache of resolved ring and image links.
+
+    Keyed by PID plus the description words used for matching, so a changed description
+    resolves again. Entries older than `ttl` seconds are ignored, and `refresh` skips all
+    reads while still writing fresh results. Queries share one SQLite connection, serialized
+    by a lock.
+    """
+
+    def __init__(self, path: str, ttl: float, refresh: bool = False):
+        self.ttl = ttl
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS links (
+                    pid TEXT NOT NULL,
+                    words TEXT NOT NULL,
+                    ring_link TEXT,
+                    image_link TEXT,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (pid, words)
+                )""")
+
+    def get(self, pid: str, words: list) -> tuple:
+        """Return (ring_link, image_link) for the PID, either may be None."""
+        if self.refresh:
+            return None, None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ring_link, image_link FROM links "
+                "WHERE pid = ? AND words = ? AND updated > ?",
+                (pid, " ".join(words), time.time() - self.ttl),
+            ).fetchone()
+        return row or (None, None)
+
+    def set(self, pid: str, words: list, ring_link: str, image_link: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?)",
+                (pid, " ".join(words), ring_link, image_link, time.time()),
+            )
+
+    def invalidate(self, pid: str) -> None:
+        """Drop every entry for the PID, e.g. when the cached image link is dead."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM links WHERE pid = ?", (pid,))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ImageStore:
+    """Content-addressed store of downloaded images, indexed in SQLite.
+
+    Images are saved as <sha256>.<ext>, so ring variants sharing the same picture are kept
+    once. The index maps image URLs to their file, so repeated URLs skip the download, and
+    records the rows each image was uploaded to, so re-runs skip those uploads. Index
+    queries are serialized by a lock; files are moved into place with os.replace, so
+    concurrent downloads of the same image are safe.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False
+        )
+        with self._conn:
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL
+                )""")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS uploads (
+                    digest TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    PRIMARY KEY (digest, row_id)
+                )""")
+
+    def get(self, url: str) -> Union[str, None]:
+        """Return the saved file for the URL, or None if it must be downloaded."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT filename FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def add(self, url: str, digest: str, temp_filename: str) -> str:
+        """Move a downloaded file into the store and return its path. The file is dropped
+        if the same bytes are already stored."""
+        extension = os.path.splitext(url.split("/")[-1].split("?")[0])[1] or ".jpg"
+        filename = os.path.join(self.directory, digest + extension)
+        if os.path.exists(filename):
+            os.unlink(temp_filename)
+        else:
+            os.replace(temp_filename, filename)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, filename)
+            )
+        return filename
+
+    @staticmethod
+    def _digest(filename: str) -> str:
+        return os.path.splitext(os.path.basename(filename))[0]
+
+    def uploaded(self, filename: str, row_id: int) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM uploads WHERE digest = ? AND row_id = ?",
+                (self._digest(filename), row_id),
+            ).fetchone()
+        return row is not None
+
+    def set_uploaded(self, filename: str, row_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO uploads VALUES (?, ?)",
+                (self._digest(filename), row_id),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def open_session() -> requests.Session:
+    """Initialize a pooled HTTP session for the fast path in get_links()."""
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def open_download_session(pool_size: int) -> requests.Session:
+    """Initialize the HTTP session shared by all download workers.
+
+    Keeps up to `pool_size` connections alive, and retries failed connections and
+    429/5xx responses with exponential backoff.
+    """
+    retries = Retry(
+        total=5, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504)
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries
+    )
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 def open_driver():
     """Open Selenium using the Chrome Driver."""
@@ -27,57 +333,149 @@ def open_smartsheet():
     return smartsheet_client
 
 
-def get_list_of_rows(smartsheet_client):
-    """Return a list of Row objects from Smartsheets.
+def get_list_of_rows(smartsheet_client) -> Iterator:
+    """Yield the Row objects from Smartsheets that do not have an image yet.
+
+    Only the PID, Description and Image columns are requested, ROWS_PAGE_SIZE rows at a
+    time, so the pipeline starts on the first page while the later pages are fetched.
+    """
+    page = 1
+    while True:
+        sheet = smartsheet_client.Sheets.get_sheet(
+            SHEET_ID,
+            column_ids=[PID_COLUMN, DESCRIPTION_COLUMN, IMAGE_COLUMN],
+            page_size=ROWS_PAGE_SIZE,
+            page=page,
+        )
+        for row in sheet.rows:
+            if not row.get_column(IMAGE_COLUMN).value:
+                yield row
+        if page * ROWS_PAGE_SIZE >= sheet.total_row_count:
+            return
+        page += 1
+
+
+def match_link(link_urls: Iterable, words: list) -> Union[str, None]:
+    """Return the first URL containing every word, or None.
 
-    Col 1 is the PIDs, Col 2 is the Image, and Col 3 is the Description.
+    Args:
+        link_urls: attribute values of the anchor elements, None for missing attributes
+        words [list]: words that must all appear in the URL
     """
-    sheet_id = "5040109000124292"
-    return smartsheet_client.Sheets.get_sheet(sheet_id)
+    for link_url in link_urls:
+        if link_url and all(i in link_url for i in words):
+            if link_url.startswith("//"):  # handle '//image..' URLs
+                link_url = "https:" + link_url
+            return link_url
+    return None
+
+
+def find_link_in_html(
+    html: str, words: list, attribute: str, base_url: str = ""
+) -> Union[str, None]:
+    """Parse a saved page and return the matching URL. Used to check pages offline.
+
+    Args:
+        base_url [str]: URL the page was fetched from, to resolve relative links
+    """
+    parser = AnchorParser(words, attribute, base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.match
+
+
+def fetch_links(
+    session: requests.Session,
+    url: str,
+    words: list,
+    attribute: str,
+    limiter: RateLimiter = None,
+) -> Union[str, None]:
+    """Fetch the page over plain HTTP and return a URL string, without a browser.
+
+    The response is streamed through AnchorParser and reading stops at the first match.
+    Returns None on a blocked/failed request or if no anchor matches, which usually means the
+    links are rendered by JavaScript. Blocked requests are reported to the limiter.
+    """
+    if limiter:
+        started = limiter.wait()
+    with session.get(url, stream=True, timeout=30) as r:
+        if limiter and r.status_code in BLOCKED_STATUS:
+            print(f"Blocked ({r.status_code}), pausing {limiter.blocked():.0f}s.")
+        if r.status_code != 200:
+            return None
+        if limiter:
+            limiter.success(started)
+        # r.url is the final URL, after any redirects
+        parser = AnchorParser(words, attribute, r.url)
+        r.encoding = r.encoding or "utf-8"
+        for chunk in r.iter_content(chunk_size=16384, decode_unicode=True):
+            parser.feed(chunk)
+            if parser.match:
+                break
+    return parser.match
+
 
+def get_links(
+    driver,
+    url: str,
+    words: list,
+    attribute: str,
+    limiter: RateLimiter = None,
+    session: requests.Session = None,
+) -> Union[str, None]:
+    """Returns a URL string, trying plain HTTP first and falling back to Selenium.
 
-def get_links(driver, url: str, words: list, attribute: str) -> Union[str, None]:
-    """Runs Selenium and returns a URL string.
+    In Selenium the anchors are matched by MATCH_LINK_SCRIPT inside the page, instead of one
+    WebDriver call per anchor.
 
     Args:
         words [list]: A list of words, from the Description field from Smartsheets, that is
-        used to filter the list of anchor elements. This is very inefficient and can likely
-        be improved.
+        used to filter the list of anchor elements.
 
         attribute [str]: HTML tag to filter on. Expect href or data-href
 
+        limiter [RateLimiter]: optional limiter shared by all workers, waited on before each
+        page load and told whether the load succeeded or was blocked
+
+        session [requests.Session]: enables the HTTP fast path if supplied, see fetch_links()
+
     Returns:
         URL or None
     """
-    driver.get(url)
-    while driver.title == "ERROR: The request could not be satisfied":
-        print(driver.title)
-        time.sleep(300)  # handle blocked requests
-        driver.get(url)
-    links = driver.find_elements(by=By.TAG_NAME, value="a")
-
-    with open("output.html", "w") as f:
-        f.write(driver.page_source)
-
-    for link in links:
+    if session:
         try:
-            link_url = link.get_attribute(attribute)
-        except selenium.common.exceptions.StaleElementReferenceException:  # handles no matches
-            pass
+            link_url = fetch_links(session, url, words, attribute, limiter)
+        except requests.RequestException:
+            link_url = None
+        if link_url:
+            return link_url
 
-        try:
-            if all(i in link_url for i in words):
-                if link_url.startswith("//"):  # handle '//image..' URLs
-                    link_url = "https:" + link_url
-                return link_url
-        except TypeError:
-            pass
-
-    return None
+    while True:
+        if limiter:
+            started = limiter.wait()
+        driver.get(url)
+        if driver.title != BLOCKED_TITLE:
+            break
+        if limiter:
+            print(f"{driver.title}, pausing {limiter.blocked():.0f}s.")
+        else:
+            print(driver.title)
+            time.sleep(300)  # handle blocked requests
+    if limiter:
+        limiter.success(started)
+    link_url = driver.execute_script(MATCH_LINK_SCRIPT, attribute, words)
+    return match_link([link_url], words)
 
 
-def get_image_url(driver, row) -> Union[str, None]:
-    """Use Selenium to query for the ring.
+def get_image_url(
+    driver,
+    row,
+    limiter: RateLimiter = None,
+    session: requests.Session = None,
+    cache: LinkCache = None,
+) -> Union[str, None]:
+    """Query the website for the ring.
 
     Uses the get_links() function to actually query. First time is for the search,
     which is expected to contain the appropriate URLs. Note that there is a marketing popup, but this
@@ -90,50 +488,88 @@ def get_image_url(driver, row) -> Union[str, None]:
             - PID: Not enough to return a single ring on it's own. Unique rings often have PID + 'PT', etc
             - Description: String of words that will typically show up in the ring's URL
                 - Ex: 'Rae Diamond Ring' -- split into a list for an 'all' match
+        limiter [RateLimiter]: optional limiter passed through to get_links()
+        session [requests.Session]: optional session passed through to get_links()
+        cache [LinkCache]: optional cache, known PIDs skip the page loads entirely
 
     Returns:
         image URL or None.
     """
     query_url = "https://www.brilliantearth.com/search/?q="
 
-    pid = row.get_column(6452170849576836).value
-    description = row.get_column(8703970663262084).value
-    words = description.split("(")[0] + f" {pid}"  # remove inconsistent size notes
+    pid, words = get_search_terms(row)
 
-    ring_link = get_links(driver, query_url + pid, words.split(), "href")
+    ring_link, image_link = cache.get(pid, words) if cache else (None, None)
+    if image_link:
+        return image_link
+
+    if not ring_link:
+        ring_link = get_links(driver, query_url + pid, words, "href", limiter, session)
 
     if ring_link:
 
         # the words for the image are 'top' and 'image' to select only the top-view image
-        image_link = get_links(driver, ring_link, ["top", "image", pid], "data-href")
+        image_link = get_links(
+            driver, ring_link, ["top", "image", pid], "data-href", limiter, session
+        )
+        if cache:
+            cache.set(pid, words, ring_link, image_link)
         return image_link
 
     return None
 
 
-def download_image(image_url: str) -> str:
+def get_search_terms(row) -> tuple:
+    """Return the PID and the list of words to match in the ring's URL."""
+    pid = row.get_column(PID_COLUMN).value
+    description = row.get_column(DESCRIPTION_COLUMN).value
+    words = description.split("(")[0] + f" {pid}"  # remove inconsistent size notes
+    return pid, words.split()
+
+
+def download_image(
+    image_url: str, store: ImageStore, session: requests.Session = None
+) -> str:
     """Cannot upload the image directly to Smartsheets, so this downloads the image first.
 
+    URLs already in the store are not requested again. Otherwise the image is hashed while it
+    streams to a temp file, which is then moved into the store under its hash, so a failed
+    download never leaves a partial image and identical images are only kept once.
+
     Args:
         image_url [str]: URL from which to download the image directly
+        store [ImageStore]: store the image is saved in
+        session [requests.Session]: shared session, see open_download_session()
 
     Returns absolute filepath to the saved location
     """
-    filename = "/Users/jdickman/Desktop/be_pics/" + image_url.split("/")[-1]
-    r = requests.get(image_url, stream=True)
+    filename = store.get(image_url)
+    if filename:
+        return filename
+
+    with (session or requests).get(image_url, stream=True, timeout=30) as r:
+        r.raise_for_status()
 
-    if r.status_code == 200:
         # Set decode_content value to True, otherwise the downloaded image file's size will be zero.
         r.raw.decode_content = True
 
-        # Open a local file with wb ( write binary ) permission.
-        with open(filename, "wb") as f:
-            shutil.copyfileobj(r.raw, f)
+        digest = hashlib.sha256()
+        fd, temp_filename = tempfile.mkstemp(dir=store.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: r.raw.read(65536), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.unlink(temp_filename)
+            raise
 
-    return filename
+    return store.add(image_url, digest.hexdigest(), temp_filename)
 
 
-def upload_image(smartsheet_client, row_id: int, filename: str) -> None:
+def upload_image(
+    smartsheet_client, row_id: int, filename: str, alt_text: str = None
+) -> None:
     """Upload image from the same directort that was used to store the image,
     and push to Smartsheets.
 
@@ -141,58 +577,491 @@ def upload_image(smartsheet_client, row_id: int, filename: str) -> None:
         - smartsheet_client object
         - row_id [int]: unique ID for the row
         - filename [str]: absolute filepath
+        - alt_text [str]: defaults to the file name
     """
     smartsheet_client.Cells.add_image_to_cell(
-        5040109000124292,  # sheet id
+        SHEET_ID,
         row_id,
-        4200371035891588,  # column id
+        IMAGE_COLUMN,
         filename,
         filename.split(".")[-1],
-        alt_text=filename.split("/")[-1],
+        alt_text=alt_text or filename.split("/")[-1],
+    )
+
+
+def lookup_worker(
+    rows_queue: queue.Queue,
+    download_queue: queue.Queue,
+    limiter: RateLimiter,
+    use_http: bool = True,
+    cache: LinkCache = None,
+) -> None:
+    """Pipeline stage 1: resolve image URLs with a dedicated Chrome driver.
+
+    Each worker owns its driver and HTTP session, as neither is thread-safe. Stops on a
+    None sentinel.
+    """
+    session = open_session() if use_http else None
+    driver = open_driver()
+    try:
+        while True:
+            row = rows_queue.get()
+            if row is None:
+                break
+
+            pid = row.get_column(PID_COLUMN).value
+            try:
+                image_url = get_image_url(driver, row, limiter, session, cache)
+            except Exception as err:  # keep the worker alive for the remaining rows
+                print(f"Lookup failed for {pid}: {err}")
+                continue
+
+            if image_url:
+                download_queue.put((row, image_url))
+            else:
+                print(f"No image found for {pid}.")
+    finally:
+        driver.quit()
+
+
+def download_worker(
+    download_queue: queue.Queue,
+    upload_queue: queue.Queue,
+    session: requests.Session,
+    store: ImageStore,
+    cache: LinkCache = None,
+) -> None:
+    """Pipeline stage 2: download images while the drivers render the next pages.
+
+    Several download workers share one session and store. A failed download invalidates the cached
+    links for the PID, so the next run resolves it again.
+    """
+    while True:
+        item = download_queue.get()
+        if item is None:
+            break
+
+        row, image_url = item
+        try:
+            filename = download_image(image_url, store, session)
+        except Exception as err:
+            print(f"Download failed for {image_url}: {err}")
+            if cache:
+                cache.invalidate(get_search_terms(row)[0])
+            continue
+        upload_queue.put((row, image_url, filename))
+
+
+def upload_worker(
+    smartsheet_client, upload_queue: queue.Queue, store: ImageStore
+) -> None:
+    """Pipeline stage 3: push downloaded images to Smartsheets.
+
+    Images the store has already uploaded to the row are skipped, e.g. when a rerun sees a
+    row before Smartsheets shows its image.
+    """
+    while True:
+        item = upload_queue.get()
+        if item is None:
+            break
+
+        row, image_url, filename = item
+        pid = row.get_column(PID_COLUMN).value
+        if store.uploaded(filename, row.id):
+            print(f"Image for {pid} already uploaded.")
+            continue
+        try:
+            upload_image(smartsheet_client, row.id, filename, image_url.split("/")[-1])
+        except Exception as err:
+            print(f"Upload failed for {pid}: {err}")
+            continue
+        store.set_uploaded(filename, row.id)
+        print(f"Uploaded image for {pid}.")
+
+
+def run_pipeline(
+    smartsheet_client,
+    rows,
+    workers: int,
+    interval: float,
+    use_http: bool = True,
+    cache: LinkCache = None,
+    downloads: int = 4,
+    download_dir: str = DOWNLOAD_DIR,
+    min_interval: float = 0.5,
+) -> None:
+    """Run the lookup -> download -> upload pipeline over the supplied rows.
+
+    One RateLimiter, LinkCache and ImageStore are shared by all workers.
+
+    Args:
+        - smartsheet_client object
+        - rows: iterable of Row objects still missing an image
+        - workers [int]: number of Selenium workers, each with its own Chrome driver
+        - interval [float]: starting seconds between page loads, across all workers
+        - use_http [bool]: try plain HTTP before Selenium for each page
+        - cache [LinkCache]: optional cache of resolved links
+        - downloads [int]: number of concurrent image downloads
+        - download_dir [str]: directory of the ImageStore the images are saved in
+        - min_interval [float]: fastest the limiter may go, in seconds between page loads
+    """
+    limiter = RateLimiter(interval, min_interval)
+    store = ImageStore(download_dir)
+    download_session = open_download_session(downloads)
+    rows_queue, download_queue, upload_queue = (
+        queue.Queue(),
+        queue.Queue(),
+        queue.Queue(),
+    )
+
+    lookups = [
+        threading.Thread(
+            target=lookup_worker,
+            args=(rows_queue, download_queue, limiter, use_http, cache),
+        )
+        for _ in range(workers)
+    ]
+    downloaders = [
+        threading.Thread(
+            target=download_worker,
+            args=(download_queue, upload_queue, download_session, store, cache),
+        )
+        for _ in range(downloads)
+    ]
+    uploader = threading.Thread(
+        target=upload_worker, args=(smartsheet_client, upload_queue, store)
+    )
+    for thread in (*lookups, *downloaders, uploader):
+        thread.start()
+
+    # rows may be a generator paging through Smartsheets, so the workers are always shut
+    # down, even if fetching a page fails, and the error is raised once they have stopped
+    try:
+        for row in rows:
+            rows_queue.put(row)
+    finally:
+        for _ in lookups:
+            rows_queue.put(None)
+
+        # drain the stages in order so each one sees every item from the previous one
+        for thread in lookups:
+            thread.join()
+        for _ in downloaders:
+            download_queue.put(None)
+        for thread in downloaders:
+            thread.join()
+        upload_queue.put(None)
+        uploader.join()
+        store.close()
+    print(f"Finished at {limiter.rate * 60:.1f} page loads/minute.")
+
+
+#
+# Pytests
+#
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SEARCH_URL = "https://www.brilliantearth.com/search/?q=BE1234"
+
+
+def _read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURE, name), "r") as f:
+        return f.read()
+
+
+def test_find_ring_link():
+    """Test relative product links are resolved against the page URL."""
+    html = _read_fixture("be_search.html")
+    link = find_link_in_html(html, ["Rae", "Ring", "BE1234"], "href", SEARCH_URL)
+    assert (
+        link
+        == "https://www.brilliantearth.com/en-us/Rae-Diamond-Ring-BE1234-Yellow-Gold/"
+    )
+    assert find_link_in_html(html, ["BE9999"], "href", SEARCH_URL) is None
+
+
+def test_find_image_link():
+    """Test protocol-relative image links, with and without the page URL."""
+    html = _read_fixture("be_search.html")
+    image = "https://image.brilliantearth.com/media/product_images/BE1234/BE1234_top_image.jpg"
+    words = ["top", "image", "BE1234"]
+    assert find_link_in_html(html, words, "data-href", SEARCH_URL) == image
+    assert find_link_in_html(html, words, "data-href") == image
+
+
+def test_anchor_parser_chunks():
+    """Test streaming the page in small chunks, as fetch_links() does, finds the same link."""
+    html = _read_fixture("be_search.html")
+    parser = AnchorParser(["Rae", "Ring", "BE1234PT"], "href", SEARCH_URL)
+    for start in range(0, len(html), 7):
+        parser.feed(html[start : start + 7])
+    assert (
+        parser.match
+        == "https://www.brilliantearth.com/en-us/Rae-Diamond-Ring-BE1234PT-Platinum/"
+    )
+
+
+def test_rate_limiter_wait():
+    """Test waits are spaced one interval apart after the first token."""
+    limiter = RateLimiter(0.05, min_interval=0.05)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.wait()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_rate_limiter_blocked():
+    """Test a block halves the rate and pauses, and a second block in the same pause is not
+    counted again."""
+    limiter = RateLimiter(1, backoff=10)
+    delay = limiter.blocked()
+    assert limiter.rate == 0.5
+    assert 5 <= delay <= 10
+    assert limiter.blocked() <= delay
+    assert limiter.rate == 0.5
+    assert limiter._blocks == 1
+
+
+def test_rate_limiter_stale_success():
+    """Test a load that started before a block does not reset the backoff, and one that
+    started after the pause does."""
+    limiter = RateLimiter(0.01, min_interval=0.01, backoff=0.02)
+    started = limiter.wait()
+    limiter.blocked()
+    rate = limiter.rate
+    limiter.success(started)
+    assert limiter.rate == rate
+    assert limiter._blocks == 1
+
+    limiter.wait()
+    limiter.blocked()
+    assert limiter._blocks == 2
+    limiter.success(limiter.wait())
+    assert limiter.rate > rate / 2
+    assert limiter._blocks == 0
+
+
+def test_link_cache(tmp_path, monkeypatch):
+    """Test entries expire after the TTL, refresh skips reads but still writes, and
+    invalidate drops every entry for the PID."""
+    path = str(tmp_path / "links.sqlite")
+    cache = LinkCache(path, ttl=60)
+    cache.set("BE1", ["Rae", "Ring"], "ring", "image")
+    cache.set("BE1", ["Rae"], "ring", None)
+    assert cache.get("BE1", ["Rae", "Ring"]) == ("ring", "image")
+    assert cache.get("BE1", ["Rae"]) == ("ring", None)
+    assert cache.get("BE1", ["Ring"]) == (None, None)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get("BE1", ["Rae", "Ring"]) == (None, None)
+    monkeypatch.undo()
+
+    refreshed = LinkCache(path, ttl=60, refresh=True)
+    assert refreshed.get("BE1", ["Rae", "Ring"]) == (None, None)
+    refreshed.set("BE1", ["Rae", "Ring"], "new ring", "new image")
+    refreshed.close()
+    assert cache.get("BE1", ["Rae", "Ring"]) == ("new ring", "new image")
+
+    cache.invalidate("BE1")
+    assert cache.get("BE1", ["Rae", "Ring"]) == (None, None)
+    assert cache.get("BE1", ["Rae"]) == (None, None)
+    cache.close()
+
+
+class _FakeImageSession:
+    """Serves fixed bytes per URL like a streamed requests response, recording each URL."""
+
+    def __init__(self, images: dict):
+        self.images = images
+        self.requested = []
+
+    def get(self, url, stream, timeout):
+        self.requested.append(url)
+        response = _FakeImageResponse()
+        response.raw = io.BytesIO(self.images[url])
+        return response
+
+
+class _FakeImageResponse:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+
+def test_image_store_dedupe(tmp_path):
+    """Test two URLs with the same bytes are stored once, and a repeat URL is not requested
+    again."""
+    image = "https://image.brilliantearth.com/media/product_images/BE{}/top_image.jpg"
+    session = _FakeImageSession(
+        {image.format(1): b"ring", image.format(2): b"ring", image.format(3): b"other"}
+    )
+    store = ImageStore(str(tmp_path))
+    first = download_image(image.format(1), store, session)
+    assert download_image(image.format(2), store, session) == first
+    assert download_image(image.format(3), store, session) != first
+    assert download_image(image.format(1), store, session) == first
+    assert session.requested == [image.format(i) for i in (1, 2, 3)]
+
+    assert os.path.basename(first) == hashlib.sha256(b"ring").hexdigest() + ".jpg"
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [os.path.basename(first), hashlib.sha256(b"other").hexdigest() + ".jpg"]
+        + ["index.sqlite"]
     )
+    store.close()
+
+
+def test_image_store_uploaded(tmp_path):
+    """Test uploads are recorded per image and row, and kept across store instances."""
+    store = ImageStore(str(tmp_path))
+    filename = os.path.join(str(tmp_path), "abc.jpg")
+    assert not store.uploaded(filename, 1)
+    store.set_uploaded(filename, 1)
+    store.set_uploaded(filename, 1)
+    assert store.uploaded(filename, 1)
+    assert not store.uploaded(filename, 2)
+    assert not store.uploaded(os.path.join(str(tmp_path), "def.jpg"), 1)
+    store.close()
 
+    store = ImageStore(str(tmp_path))
+    assert store.uploaded(filename, 1)
+    store.close()
 
-def main() -> None:
+
+#
+# End Pytests
+#
+
+
+def main(
+    workers: int = 1,
+    interval: float = 3,
+    use_http: bool = True,
+    cache_file: str = CACHE_FILE,
+    cache_ttl_days: float = 30,
+    refresh: bool = False,
+    downloads: int = 4,
+    download_dir: str = DOWNLOAD_DIR,
+    min_interval: float = 0.5,
+) -> None:
     """Program to upload images of Brilliant Earth Rings given a list of PIDs/Descriptions.
     PIDs and Description fields are in Smartsheets, and the images are uploaded to the same
     sheet.
 
     Functions:
-        - Initalize Selenium
         - Initialize Smartsheets
-        - Use Smartsheets API to return list of rows with PIDs
-            Manually sliced for where to begin
-        - Pass the rows to Selenium:
+        - Use Smartsheets API to page through the rows with PIDs and no image
+        - Pass the rows to a pool of workers, each with its own HTTP session and Chrome driver:
             - Use the PID to search the website
             - Find product URL directly on this results page
             - Use this URL to navigate to the product
             - Find the appropriate image on this page
-        - Save the image locally, using the requests library
+        - Save the images locally, several at once over a shared requests session, keeping
+            one copy of each distinct image
         - Upload the image to the appropriate Smartsheets column/row
-    """
-    driver = open_driver()
-    smartsheet_client = open_smartsheet()
 
-    # Get list of rows and filter out rows with an image already uploaded
-    rows_all = get_list_of_rows(smartsheet_client)
-    rows = [row for row in rows_all if not row.get_column(4200371035891588).value]
+    Pages are fetched over plain HTTP first; Selenium is only used when the links are not in
+    the raw HTML. The stages run concurrently, connected by queues, and page loads are spaced by a
+    shared adaptive rate limit, which speeds up while pages load and backs off when blocked.
 
-    for row in rows:
-        pid = row.get_column(6452170849576836).value
-        image_url = get_image_url(driver, row)
-
-        if image_url:
-            filename = download_image(image_url)
-            upload_image(smartsheet_client, row.id, filename)
-            print(f"Uploaded image for {pid}.")
-
-        else:
-            print(f"No image found for {pid}.")
+    Resolved links are cached on disk, so re-runs skip the page loads for known PIDs and go
+    straight to download/upload. `refresh` ignores the cached links.
+    """
+    smartsheet_client = open_smartsheet()
 
-        time.sleep(3)
+    # rows with an image already uploaded are filtered out as the pages arrive
+    rows = get_list_of_rows(smartsheet_client)
 
-    driver.quit()
+    cache = LinkCache(cache_file, cache_ttl_days * 86400, refresh)
+    try:
+        run_pipeline(
+            smartsheet_client,
+            rows,
+            workers,
+            interval,
+            use_http,
+            cache,
+            downloads,
+            download_dir,
+            min_interval,
+        )
+    finally:
+        cache.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Upload Brilliant Earth ring images.")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of Chrome drivers scraping in parallel",
+    )
+    parser.add_argument(
+        "-i",
+        "--interval",
+        type=float,
+        default=3,
+        help="Starting seconds between page loads across all workers",
+    )
+    parser.add_argument(
+        "--min_interval",
+        type=float,
+        default=0.5,
+        help="Fewest seconds between page loads the rate limit may speed up to",
+    )
+    parser.add_argument(
+        "-s",
+        "--selenium_only",
+        action="store_true",
+        help="Skip the plain HTTP fast path and load every page in Chrome",
+    )
+    parser.add_argument(
+        "-c",
+        "--cache",
+        default=CACHE_FILE,
+        help="SQLite file caching resolved ring/image links",
+    )
+    parser.add_argument(
+        "--ttl",
+        type=float,
+        default=30,
+        help="Days before a cached link is resolved again",
+    )
+    parser.add_argument(
+        "-r",
+        "--refresh",
+        action="store_true",
+        help="Ignore cached links and resolve every PID again",
+    )
+    parser.add_argument(
+        "-d",
+        "--downloads",
+        type=int,
+        default=4,
+        help="Number of images downloaded in parallel",
+    )
+    parser.add_argument(
+        "--download_dir",
+        default=DOWNLOAD_DIR,
+        help="Directory the images are saved in",
+    )
+    args = parser.parse_args()
+
+    main(
+        args.workers,
+        args.interval,
+        not args.selenium_only,
+        args.cache,
+        args.ttl,
+        args.refresh,
+        args.downloads,
+        args.download_dir,
+        args.min_interval,
+    )
@@ -0,0 +1,116 @@
+import argparse
+import json
+import platform
+import random
+import timeit
+
+import blackjack
+import cards
+import simulate
+import strategy
+
+
+def _deal_repeatedly(number: int, seed: int):
+    """Deal `number` cards per call from one Deck, so the refill path is hit once the
+    deck runs low."""
+    deck = cards.Deck(rng=random.Random(seed))
+    return lambda: deck.deal_cards(number)
+
+
+def _shoe_deal(seed: int):
+    """Deal 5 cards per round from one Shoe, reshuffling at the cut card."""
+    shoe = cards.Shoe(rng=random.Random(seed))
+
+    def deal():
+        shoe.start_round()
+        return shoe.deal(5)
+
+    return deal
+
+
+def _calc_points(hand: list):
+    game = blackjack.Blackjack()
+    hand = [cards.Card(value, "Hearts") for value in hand]
+    return lambda: game._calc_points(hand)
+
+
+def _hands(seed: int):
+    """One full headless deal -> hit -> resolve cycle per call."""
+    game = simulate.HeadlessBlackjack(cards.Shoe(rng=random.Random(seed)))
+    play_hand, hit_below = game.play_hand, strategy.HitBelow(17)
+    return lambda: play_hand(hit_below)
+
+
+def benchmarks(seed: int) -> dict:
+    """Return {name: callable} for every benchmark, each set up from the seed."""
+    return {
+        "deck_create": lambda: cards.Deck(rng=random.Random(seed)),
+        "deal_cards_1": _deal_repeatedly(1, seed),
+        "deal_cards_5": _deal_repeatedly(5, seed),
+        "deal_cards_52": _deal_repeatedly(52, seed),
+        "deal_cards_110": _deal_repeatedly(110, seed),
+        "shoe_deal_5": _shoe_deal(seed),
+        "calc_points_typical": _calc_points(["King", "7"]),
+        "calc_points_aces": _calc_points(["Ace", "Ace", "Ace", "5", "Ace", "King"]),
+        "hand_append": lambda: blackjack.Hand(
+            [cards.CARDS[0], cards.CARDS[5], cards.CARDS[12]]
+        ),
+        "headless_hand": _hands(seed),
+    }
+
+
+def run(seed: int = 0, number: int = 10_000, repeat: int = 5) -> dict:
+    """Time every benchmark and return the results, ready for JSON.
+
+    Each benchmark is timed `repeat` times over `number` calls and the fastest run is kept.
+    """
+    results = {}
+    for name, func in benchmarks(seed).items():
+        random.seed(seed)
+        best = min(timeit.repeat(func, number=number, repeat=repeat))
+        results[name] = {
+            "ns_per_op": best / number * 1e9,
+            "ops_per_second": number / best,
+        }
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "number": number,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+#
+# Pytests
+#
+
+
+def test_run():
+    """Test every benchmark runs and reports a timing."""
+    report = run(number=10, repeat=1)
+    assert set(report["results"]) == set(benchmarks(0))
+    assert all(result["ns_per_op"] > 0 for result in report["results"].values())
+    json.dumps(report)
+
+
+#
+# End Pytests
+#
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark card_games.")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-n", "--number", type=int, default=10_000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    report = run(args.seed, args.number, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
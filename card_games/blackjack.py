@@ -1,33 +1,138 @@
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 import cards
+import strategy as strategies
+
+# points per rank (cards.CARD_RANKS, 0 is padding) with Aces counted as 1, the soft 11 is
+# added by calc_points_batch
+HARD_POINTS = (0, *cards.CARD_POINTS[:13])
+# points per card value with Aces counted as 1, for scoring a hand of card names
+VALUE_POINTS = dict(zip(cards.VALUES, cards.CARD_POINTS[:13]))
+
+
+def hand_points(hard: int, aces: int) -> int:
+    """Return the points for a hand from its total with Aces as 1.
+
+    Only one Ace can ever count as 11 without busting, so 10 is added if the hand has an Ace
+    and room for it.
+    """
+    return hard + 10 if aces and hard <= 11 else hard
+
+
+def dealer_hits(player_points: int, dealer_points: int) -> bool:
+    """The dealer keeps hitting while behind the player."""
+    return player_points > dealer_points
+
+
+def dealer_plays(player_points: int, dealer_points: int) -> bool:
+    """A player on 21 stops, and the dealer plays out the hand if behind."""
+    return dealer_points < player_points == 21
+
+
+def calc_points_batch(hands) -> tuple:
+    """Calculate points for many hands at once.
+
+    Only one Ace can ever count as 11 without busting, so instead of demoting Aces one at
+    a time the hard total is looked up and 10 added if the hand has an Ace and room for it.
+    With NumPy installed this is done on the whole 2-D array at once, otherwise hand by hand.
+
+    Args:
+        hands: 2-D sequence of card ranks, one row per hand, padded with 0
+
+    Returns:
+        (totals, soft): points per hand, and True where an Ace counts as 11, as arrays with
+        NumPy and lists without
+    """
+    if np is not None and len(hands):
+        ranks = np.asarray(hands, dtype=np.intp)
+        hard = np.asarray(HARD_POINTS)[ranks].sum(axis=1)
+        soft = (ranks == 1).any(axis=1) & (hard <= 11)
+        return hard + 10 * soft, soft
+
+    totals, soft = [], []
+    for hand in hands:
+        hard = sum(map(HARD_POINTS.__getitem__, hand))
+        points = hand_points(hard, 1 in hand)
+        totals.append(points)
+        soft.append(points != hard)
+    return totals, soft
+
+
+class Hand(list):
+    """List of Cards that keeps its points up to date as Cards are added.
+
+    The hard total (Aces as 1) and the number of Aces are looked up in the card code tables
+    on every append/extend, so the points are never recalculated from the whole hand. Cards
+    dealt as codes are added with extend_codes().
+    """
+
+    __slots__ = ("hard", "aces")
+
+    def __init__(self, hand: list = ()):
+        super().__init__()
+        self.hard = 0
+        self.aces = 0
+        self.extend(hand)
+
+    def append(self, card: cards.Card):
+        self.append_code(cards.CARD_CODES[card])
+
+    def append_code(self, code: int):
+        super().append(cards.CARDS[code])
+        self.hard += cards.CARD_POINTS[code]
+        self.aces += cards.CARD_RANKS[code] == 1
+
+    def extend(self, hand: list):
+        for card in hand:
+            self.append(card)
+
+    def extend_codes(self, codes):
+        for code in codes:
+            self.append_code(code)
+
+    @property
+    def soft(self) -> bool:
+        """True if an Ace is counting as 11."""
+        return self.points != self.hard
+
+    @property
+    def points(self) -> int:
+        return hand_points(self.hard, self.aces)
+
+
+def hand_result(player_points: int, dealer_points: int) -> int:
+    """Return 1 if the player won, -1 if the player lost and 0 for a draw."""
+    if player_points == dealer_points:
+        return 0
+    elif player_points > 21 or 21 > dealer_points > player_points:
+        return -1
+    return 1
 
 
 class Blackjack:
     game_over = False
 
-    def __init__(self):
-        self.deck = cards.Deck()
+    def __init__(self, deck=None):
+        """Start with $100, dealing from the Deck or Shoe supplied or a new Deck."""
+        self.deck = deck if deck is not None else cards.Deck()
         self.money = 100
         self.money_lost = 0
         self.bet = 0
 
     def _calc_points(self, hand: list) -> int:
         """Calculate points for the hand supplied."""
-        num_aces = 0
-        points = 0
+        hard = 0
+        aces = False
         for card in hand:
-            if card.value in ("Jack", "Queen", "King"):
-                points += 10
-            elif card.value == "Ace":
-                num_aces += 1
-                points += 11
-            else:
-                points += int(card.value)
-
-        while points > 21 and num_aces:
-            points -= 10
-            num_aces -= 1
-
-        return points
+            points = VALUE_POINTS[card.value]
+            hard += points
+            aces = aces or points == 1
+        return hand_points(hard, aces)
 
     def _test_game_over(self):
         """Check if game_over (i.e. break conditions):
@@ -36,7 +141,7 @@ class Blackjack:
         - player has over 21
             player busts
         """
-        if self.dealer_points < self.player_points == 21:
+        if dealer_plays(self.player_points, self.dealer_points):
             self.dealer_hit()
 
         elif self.player_points > 21:
@@ -46,19 +151,17 @@ class Blackjack:
         """Hit and return calculated points.
 
         Args:
-            hand [list]: list of Card objects. Expect either self.player_hand or
-            self.dealer_hand
+            hand [Hand]: Expect either self.player_hand or self.dealer_hand
         """
-        new_card = self.deck.deal_cards(1)
-        hand.extend(new_card)
-        return self._calc_points(hand)
+        hand.extend_codes(self.deck.deal(1))
+        return hand.points
 
     def _show_last_card(self):
         """Draw last card on lose or draw."""
         return self.deck.deal_cards(1)
 
-    def _print_cards_per(self, player: str, hand: list):
-        """Print cards and points per-player.
+    def _format_cards_per(self, player: str, hand: list) -> str:
+        """Format cards and points per-player.
 
         - if player or game_over == True, then all cards will be shown and the point
         total displayed.
@@ -78,9 +181,15 @@ class Blackjack:
         else:
             cards_str = f"{hand[0]}, UNKNOWN"
 
-        print(
-            f"{player.capitalize()} Hand:\n\t{cards_str}",
-            f"\n\tPoints: {points}",
+        return f"{player.capitalize()} Hand:\n\t{cards_str} \n\tPoints: {points}"
+
+    def format_cards(self) -> str:
+        """Return the cards & points for both the dealer and player."""
+        return "\n".join(
+            (
+                self._format_cards_per("dealer", self.dealer_hand),
+                self._format_cards_per("player", self.player_hand),
+            )
         )
 
     def _laugh_at_player(self):
@@ -89,7 +198,7 @@ class Blackjack:
         print(f"\tThe next card was the {str(last_card[0])}\n")
 
         self.player_hand.extend(last_card)
-        points = self._calc_points(self.player_hand)
+        points = self.player_hand.points
 
         if 21 >= points > self.dealer_points:
             print("\tHaha, you would have won, sucker!")
@@ -114,12 +223,16 @@ class Blackjack:
         - deal 2 to player and dealer
         - Calculate points for each player
         - Test if player has 21, no need to prompt for stay/hit
+
+        Rounds start here, so a shoe past its cut card is reshuffled before the deal.
         """
-        self.dealer_hand = self.deck.deal_cards(2)
-        self.player_hand = self.deck.deal_cards(2)
+        self.deck.start_round()
+        self.dealer_hand, self.player_hand = Hand(), Hand()
+        self.dealer_hand.extend_codes(self.deck.deal(2))
+        self.player_hand.extend_codes(self.deck.deal(2))
 
-        self.dealer_points = self._calc_points(self.dealer_hand)
-        self.player_points = self._calc_points(self.player_hand)
+        self.dealer_points = self.dealer_hand.points
+        self.player_points = self.player_hand.points
 
         self._test_game_over()
 
@@ -131,27 +244,27 @@ class Blackjack:
     def dealer_hit(self):
         """Hit dealer, looping until dealer_points are equal to or greater
         than the player_points, then changing game_over to True."""
-        while self.player_points > self.dealer_points:
+        while dealer_hits(self.player_points, self.dealer_points):
             self.dealer_points = self._hit(self.dealer_hand)
 
         self.game_over = True
 
     def show_cards(self):
         """Show the cards & points for both the dealer and player."""
-        self._print_cards_per("dealer", self.dealer_hand)
-        self._print_cards_per("player", self.player_hand)
+        print(self.format_cards())
         print("")
 
     def show_winner(self):
         """Determine winner, print GAME OVER string."""
         msg = "\n***** Game Over -- {} *****\n"
+        result = hand_result(self.player_points, self.dealer_points)
 
-        if self.player_points == self.dealer_points:
+        if result == 0:
             print(msg.format("DRAW"))
             print("At least you didn't lose any money.")
             self._laugh_at_player()
 
-        elif self.player_points > 21 or 21 > self.dealer_points > self.player_points:
+        elif result < 0:
             self.calc_bet()
             print(msg.format("YOU LOSE"))
             print(f"You lost ${self.bet}")
@@ -173,24 +286,55 @@ def create_hand(hand: list) -> list:
     return [cards.Card(i, "Hearts") for i in hand]
 
 
+HANDS = [
+    (12, ["Ace", "Ace", "10"]),
+    (13, ["Ace", "Ace", "Ace", "10"]),
+    (14, ["Ace", "Ace", "Ace", "Ace", "10"]),
+    (17, ["Ace", "Ace", "King", "5"]),
+    (18, ["Ace", "Ace", "Ace", "King", "5"]),
+    (26, ["Ace", "King", "Queen", "5"]),
+]
+
+
 def test_hands():
     """Test various hand conditions."""
-    hands = [
-        (12, ["Ace", "Ace", "10"]),
-        (13, ["Ace", "Ace", "Ace", "10"]),
-        (14, ["Ace", "Ace", "Ace", "Ace", "10"]),
-        (17, ["Ace", "Ace", "King", "5"]),
-        (18, ["Ace", "Ace", "Ace", "King", "5"]),
-        (26, ["Ace", "King", "Queen", "5"]),
-    ]
-
     game = Blackjack()
-    for hand_points in hands:
+    for hand_points in HANDS:
         hand = create_hand(hand_points[1])
         points = game._calc_points(hand)
         assert points == hand_points[0]
 
 
+def test_hand_points():
+    """Test Hand, adding one card at a time, matches _calc_points on every step."""
+    game = Blackjack()
+    for hand_points in HANDS:
+        hand = Hand()
+        for card in create_hand(hand_points[1]):
+            hand.append(card)
+            assert hand.points == game._calc_points(hand)
+        assert hand.points == hand_points[0]
+
+    assert Hand(create_hand(["Ace", "6"])).soft
+    assert not Hand(create_hand(["Ace", "6", "10"])).soft
+
+
+def test_calc_points_batch():
+    """Test batch totals and soft flags, with padded rows."""
+    hands = [
+        [1, 6, 0, 0],  # soft 17
+        [1, 6, 10, 0],  # hard 17
+        [1, 1, 0, 0],  # soft 12
+        [13, 12, 5, 0],  # bust
+        [1, 13, 0, 0],  # blackjack
+        [0, 0, 0, 0],
+    ]
+    totals, soft = calc_points_batch(hands)
+    assert list(totals) == [17, 17, 12, 25, 21, 0]
+    assert list(soft) == [True, False, True, False, True, False]
+    assert calc_points_batch([]) == ([], [])
+
+
 def test_21():
     """Test if player score == 21 ends the game."""
     game = Blackjack()
@@ -223,7 +367,8 @@ def test_win_bet():
 #
 
 
-def main():
+def main(strategy: strategies.Strategy = None):
+    """Play interactively. If a strategy is given, it makes the hit/stay decisions."""
     game = Blackjack()
 
     play = True
@@ -259,6 +404,9 @@ def main():
         while not game.game_over:
 
             response = ""
+            if strategy:
+                response = "hit" if strategy(game) else "stay"
+                print(f"Strategy says {response}.")
             while response not in ("hit", "stay"):
                 response = input("Hit or stay? ").lower()
 
@@ -298,4 +446,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Play Blackjack.")
+    parser.add_argument(
+        "-c",
+        "--chart",
+        help="CSV or JSON strategy chart that plays the hit/stay decisions",
+    )
+    args = parser.parse_args()
+
+    main(strategies.load_chart(args.chart) if args.chart else None)
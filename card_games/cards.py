@@ -1,25 +1,53 @@
 import random
+from array import array
 from collections import namedtuple
 from typing import Union
 
 
 class Card(namedtuple("Card", ["value", "suit"])):
+    __slots__ = ()  # no per-card __dict__, a Card is just the tuple
+
     def __str__(self):
         """Overload string return, ex: '2 of Hearts'"""
         return f"{self.value} of {self.suit}"
 
 
+# Cards are encoded as integers 0-51: suit * 13 + rank - 1, with rank 1 (Ace) to 13 (King)
+SUITS = ("Hearts", "Spades", "Diamonds", "Clubs")
+VALUES = ("Ace", *(str(i) for i in range(2, 11)), "Jack", "Queen", "King")
+
+# lookup tables indexed by card code. CARDS holds the only Card instance of each card.
+CARDS = tuple(Card(value, suit) for suit in SUITS for value in VALUES)
+CARD_CODES = {card: code for code, card in enumerate(CARDS)}
+CARD_RANKS = tuple(code % 13 + 1 for code in range(52))
+CARD_SUITS = tuple(card.suit for card in CARDS)
+# blackjack points with Aces as 1, hands add 10 for an Ace when there is room
+CARD_POINTS = tuple(min(rank, 10) for rank in CARD_RANKS)
+CARD_NAMES = tuple(str(card) for card in CARDS)
+
+
+def card_from_code(code: int) -> Card:
+    """Return the Card for an integer card code."""
+    return CARDS[code]
+
+
 class Deck:
-    def __init__(self):
-        """Create Deck from Card class as a list of namedtuples and shuffle the deck."""
+    def __init__(self, rng: random.Random = None):
+        """Create Deck from Card class as a list of namedtuples and shuffle the deck.
+
+        Args:
+            rng [random.Random]: random generator used to shuffle, the global random module
+            if not supplied. Pass a seeded generator for reproducible decks.
+        """
+        self.rng = rng or random
         self.deck = self._create_deck()
         self.shuffle(self.deck)
 
     def _create_deck(self) -> list:
-        """Create new deck."""
-        self.suits = ["Hearts", "Spades", "Diamonds", "Clubs"]
-        self.values = [str(i) for i in range(2, 11)] + ["Ace", "King", "Queen", "Jack"]
-        return [Card(val, suit) for suit in self.suits for val in self.values]
+        """Create new deck from the shared Card instances."""
+        self.suits = list(SUITS)
+        self.values = list(VALUES)
+        return list(CARDS)
 
     def cards_in_deck(self) -> int:
         """Return length of current deck."""
@@ -36,11 +64,11 @@ class Deck:
         Args:
             deck [list]: list of Card objects
         """
-        random.shuffle(deck)
+        self.rng.shuffle(deck)
 
     def draw_one(self) -> Card:
         """Draw one random card and put back into the deck."""
-        return random.choice(self.deck)
+        return self.rng.choice(self.deck)
 
     def deal_cards(self, number, return_list=False) -> Union[list, Card]:
         """Deal defined number of cards from the deck, removing the cards.
@@ -49,20 +77,196 @@ class Deck:
             number [int]: number of cards to deal
             return_list [bool]: return output as list if True
         """
-        if number > 52 or number > len(self.deck):
+        while number > len(self.deck):
             self.add_new_deck()
-        dealt_cards = [self.deck.pop(0) for _ in range(number)]
+        dealt_cards = self.deck[:number]
+        del self.deck[:number]
         if return_list:
             return [str(i) for i in dealt_cards]
         else:
             return dealt_cards
 
+    def deal(self, number: int) -> list:
+        """Deal defined number of cards as card codes, same as Shoe.deal()."""
+        return [CARD_CODES[card] for card in self.deal_cards(number)]
+
     def add_new_deck(self):
         """Create and shuffle a new deck, and add to existing deck."""
         new_deck = self._create_deck()
         self.shuffle(new_deck)
         self.deck.extend(new_deck)
 
+    def start_round(self):
+        """Nothing to do between rounds, new decks are added as the deck runs out."""
+
+
+class Shoe:
+    """Multi-deck shoe stored as an array of integer card codes, see card_from_code().
+
+    Cards are dealt by moving a cursor through the shuffled array rather than removing
+    them, and Card objects are only created by deal_cards(). Once the cursor passes the cut
+    card, placed at `penetration` of the shoe, the whole shoe is reshuffled by the next
+    start_round(), never in the middle of a round.
+    """
+
+    def __init__(
+        self, decks: int = 6, penetration: float = 0.75, rng: random.Random = None
+    ):
+        self.rng = rng or random
+        self.decks = decks
+        self.cards = array("b", range(52)) * decks
+        self.cut_card = int(len(self.cards) * penetration)
+        self.shuffle()
+
+    def shuffle(self):
+        """Shuffle all cards back into the shoe.
+
+        Sorting on a random key per card is a uniform shuffle, and about twice as fast as
+        rng.shuffle(), which draws a bounded random integer per card.
+        """
+        rand = self.rng.random
+        self.cards = array("b", sorted(self.cards, key=lambda _: rand()))
+        self.position = 0
+        self.round_start = 0
+
+    @property
+    def reshuffle_pending(self) -> bool:
+        """True once the cut card has been passed."""
+        return self.position >= self.cut_card
+
+    def start_round(self):
+        """Reshuffle if the cut card has been passed, and mark the cards dealt from here on
+        as in play."""
+        if self.reshuffle_pending:
+            self.shuffle()
+        self.round_start = self.position
+
+    def _shuffle_discards(self):
+        """Out of cards mid-round: shuffle the discards and the undealt cards together,
+        keeping the cards in play out of the shoe."""
+        in_play = self.cards[self.round_start : self.position]
+        rest = self.cards[: self.round_start] + self.cards[self.position :]
+        self.rng.shuffle(rest)
+        self.cards = in_play + rest
+        self.round_start = 0
+        self.position = len(in_play)
+
+    def cards_in_deck(self) -> int:
+        """Return number of cards left before the end of the shoe."""
+        return len(self.cards) - self.position
+
+    def deal(self, number: int) -> array:
+        """Deal defined number of cards as an array of card codes.
+
+        Args:
+            number [int]: number of cards to deal, at most the cards not in play
+        """
+        start = self.position
+        if start + number > len(self.cards):
+            self._shuffle_discards()
+            start = self.position
+            if start + number > len(self.cards):
+                raise ValueError(f"Cannot deal {number} cards from {self.decks} decks.")
+        self.position = start + number
+        return self.cards[start : self.position]
+
+    def deal_cards(self, number, return_list=False) -> list:
+        """Deal defined number of cards as Card objects, same as Deck.deal_cards().
+
+        Args:
+            number [int]: number of cards to deal
+            return_list [bool]: return output as list of strings if True
+        """
+        codes = self.deal(number)
+        if return_list:
+            return [CARD_NAMES[code] for code in codes]
+        else:
+            return [CARDS[code] for code in codes]
+
+
+#
+# Pytests
+#
+
+
+def test_deck_deal_refills():
+    """Test dealing more than is left, or more than one deck, adds new decks."""
+    deck = Deck()
+    deck.deal_cards(50)
+    assert len(deck.deal_cards(110)) == 110
+    assert deck.cards_in_deck() == 52 * 4 - 160
+
+
+def test_shoe_deal():
+    """Test the shoe deals every card of every deck once before the cut card."""
+    shoe = Shoe(decks=2, penetration=1)
+    dealt = shoe.deal(100).tolist() + shoe.deal(4).tolist()
+    assert sorted(dealt) == sorted(list(range(52)) * 2)
+    assert shoe.cards_in_deck() == 0
+
+
+def test_shoe_cut_card():
+    """Test the shoe only reshuffles at the start of a round once past the cut card."""
+    shoe = Shoe(decks=1, penetration=0.5)
+    shoe.deal(26)
+    assert shoe.reshuffle_pending
+    shoe.deal(2)
+    assert shoe.cards_in_deck() == 24
+    shoe.start_round()
+    assert shoe.cards_in_deck() == 52
+    assert not shoe.reshuffle_pending
+
+
+def test_shoe_out_of_cards():
+    """Test running out mid-round only reshuffles the cards not in play."""
+    shoe = Shoe(decks=1, penetration=1)
+    shoe.deal(40)
+    shoe.start_round()
+    in_play = shoe.deal(10).tolist()
+    in_play += shoe.deal(5).tolist()
+    assert sorted(in_play + shoe.deal(37).tolist()) == list(range(52))
+    try:
+        shoe.deal(1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("dealt a card that is in play")
+
+
+def test_seeded_shoe():
+    """Test shoes with the same seeded generator deal the same cards."""
+    first, second = Shoe(rng=random.Random(1)), Shoe(rng=random.Random(1))
+    assert first.deal(300) == second.deal(300)
+
+
+def test_card_tables():
+    """Test the lookup tables agree with the Cards, and Cards are shared between decks."""
+    assert CARD_NAMES[0] == "Ace of Hearts"
+    assert CARD_NAMES[51] == "King of Clubs"
+    assert CARD_POINTS[CARD_CODES[Card("Queen", "Spades")]] == 10
+    assert CARD_POINTS[CARD_CODES[Card("Ace", "Clubs")]] == 1
+    assert [CARD_RANKS[i] for i in range(13)] == list(range(1, 14))
+    assert all(CARDS[CARD_CODES[card]] is card for card in CARDS)
+    assert all(CARD_SUITS[CARD_CODES[card]] == card.suit for card in CARDS)
+    assert not hasattr(CARDS[0], "__dict__")
+    assert set(map(id, Deck().deck)) == set(map(id, Deck().deck))
+
+
+def test_shoe_deal_cards():
+    """Test Card objects are created from the codes."""
+    assert card_from_code(0) == Card("Ace", "Hearts")
+    assert card_from_code(51) == Card("King", "Clubs")
+    assert str(Shoe().deal_cards(1)[0]) in {str(card_from_code(i)) for i in range(52)}
+    assert Shoe().deal_cards(1, return_list=True)[0] in CARD_NAMES
+    deck = Deck()
+    top = deck.deck[:3]
+    assert [CARDS[code] for code in deck.deal(3)] == top
+
+
+#
+# End Pytests
+#
+
 
 if __name__ == "__main__":
     deck = Deck()
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+
+import server
+
+
+async def play(host: str, port: int) -> None:
+    """Play at a table on the Blackjack server from the terminal."""
+    reader, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                print("Connection closed.")
+                break
+
+            text = line.decode().rstrip("\n")
+            if not text.startswith(server.PROMPT):
+                print(text)
+                continue
+
+            # input() blocks, so read it off the event loop
+            command = await loop.run_in_executor(None, input, text + " ")
+            writer.write((command + "\n").encode())
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play Blackjack on a table server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8021)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(play(args.host, args.port))
+    except (KeyboardInterrupt, EOFError):
+        pass
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import random
+import time
+
+import server
+
+
+async def _response(reader: asyncio.StreamReader) -> list[str]:
+    """Read lines up to and including the next prompt. Empty if the server hung up."""
+    lines = []
+    while not lines or not lines[-1].startswith(server.PROMPT):
+        line = await reader.readline()
+        if not line:
+            return []
+        lines.append(line.decode().rstrip("\n"))
+    return lines
+
+
+async def player(host: str, port: int, hands: int, seed: int, latencies: list) -> int:
+    """Play hands at one table, betting $1 and choosing hit/stay at random.
+
+    Appends the latency of every command to latencies and returns the hands completed.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    played = 0
+    try:
+        lines = await _response(reader)
+        while played < hands and lines:
+            command = (
+                "bet 1"
+                if lines[-1] == server.BET_PROMPT
+                else rng.choice(("hit", "stay"))
+            )
+            start = time.perf_counter()
+            writer.write((command + "\n").encode())
+            await writer.drain()
+            lines = await _response(reader)
+            latencies.append(time.perf_counter() - start)
+            if lines and lines[-1] == server.BET_PROMPT:
+                played += 1
+        writer.write(b"quit\n")
+        await writer.drain()
+    finally:
+        writer.close()
+    return played
+
+
+async def run(host: str, port: int, clients: int, hands: int, idle: int) -> dict:
+    """Connect the idle and active clients, play, and return the throughput figures."""
+    idle_connections = [await asyncio.open_connection(host, port) for _ in range(idle)]
+
+    latencies = []
+    start = time.perf_counter()
+    played = await asyncio.gather(
+        *(player(host, port, hands, i, latencies) for i in range(clients))
+    )
+    elapsed = time.perf_counter() - start
+
+    for _, writer in idle_connections:
+        writer.close()
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "idle": idle,
+        "hands": sum(played),
+        "seconds": elapsed,
+        "hands_per_second": sum(played) / elapsed,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Blackjack server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8021)
+    parser.add_argument("-c", "--clients", type=int, default=100)
+    parser.add_argument("-n", "--hands", type=int, default=100, help="Hands per client")
+    parser.add_argument(
+        "-i", "--idle", type=int, default=0, help="Extra connections left idle"
+    )
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args.host, args.port, args.clients, args.hands, args.idle))
+    print(
+        f"{stats['hands']} hands by {stats['clients']} clients "
+        f"({stats['idle']} idle) in {stats['seconds']:.2f}s"
+    )
+    print(f"Hands/second: {stats['hands_per_second']:.0f}")
+    print(f"p99 action latency: {stats['p99_ms']:.2f} ms")
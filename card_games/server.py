@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+
+import blackjack
+
+# every response ends with a line starting with PROMPT, or the connection is closed
+PROMPT = "> "
+BET_PROMPT = PROMPT + "Place your bet:"
+ACTION_PROMPT = PROMPT + "Hit or stay?"
+
+
+class Table:
+    """One player's Blackjack session: its own game, deck, bankroll and bet.
+
+    handle() takes one line from the player and returns the response lines, without any
+    I/O, so many tables can share one event loop.
+    """
+
+    __slots__ = ("game", "in_hand")
+
+    def __init__(self):
+        self.game = blackjack.Blackjack()
+        self.in_hand = False
+
+    def welcome(self) -> list[str]:
+        return [f"You have: ${self.game.money}", BET_PROMPT]
+
+    def handle(self, line: str) -> list[str]:
+        """Return the response to a command: bet <amount>, hit, stay or money."""
+        command, _, arg = line.strip().lower().partition(" ")
+
+        if command == "money":
+            return [
+                f"You have: ${self.game.money}",
+                f"You have lost: ${self.game.money_lost}",
+                ACTION_PROMPT if self.in_hand else BET_PROMPT,
+            ]
+
+        if not self.in_hand:
+            if command != "bet":
+                return ["Place a bet first.", BET_PROMPT]
+            return self._bet(arg)
+
+        if command == "hit":
+            self.game.player_hit()
+        elif command == "stay":
+            self.game.dealer_hit()
+        else:
+            return ["Hit or stay?", ACTION_PROMPT]
+        return self._status()
+
+    def _bet(self, arg: str) -> list[str]:
+        """Validate the bet, same rules as blackjack.main(), and deal."""
+        try:
+            bet = int(arg)
+        except ValueError:
+            return ["Must be valid bet.", BET_PROMPT]
+        if bet > self.game.money:
+            return ["You are too poor for that bet.", BET_PROMPT]
+        elif bet <= 0:
+            return ["Stop betting nonsense.", BET_PROMPT]
+
+        self.game.bet = bet
+        self.game.game_over = False
+        self.game.deal()
+        self.in_hand = True
+        return [f"You bet ${bet}", *self._status()]
+
+    def _status(self) -> list[str]:
+        """Show the cards, and settle the bet if the hand is over."""
+        lines = [self.game.format_cards()]
+        if not self.game.game_over:
+            return [*lines, ACTION_PROMPT]
+
+        self.in_hand = False
+        result = blackjack.hand_result(self.game.player_points, self.game.dealer_points)
+        if result == 0:
+            lines.append("***** Game Over -- DRAW *****")
+        else:
+            self.game.calc_bet(win=result > 0)
+            lines.append(
+                f"***** Game Over -- {'YOU WIN' if result > 0 else 'YOU LOSE'} *****"
+            )
+        lines.append(f"You have: ${self.game.money}")
+        return lines
+
+    @property
+    def broke(self) -> bool:
+        return not self.in_hand and self.game.money == 0
+
+
+async def handle_connection(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    """Serve one Table over a line protocol until the player quits, goes broke or
+    disconnects."""
+    table = Table()
+    writer.write(("\n".join(table.welcome()) + "\n").encode())
+    try:
+        while True:
+            await writer.drain()
+            line = await reader.readline()
+            if not line or line.strip().lower() == b"quit":
+                break
+
+            lines = table.handle(line.decode(errors="replace"))
+            if table.broke:
+                lines.append("You're broke, get out of the casino!")
+                writer.write(("\n".join(lines) + "\n").encode())
+                break
+            if not table.in_hand and lines[-1] != BET_PROMPT:
+                lines.append(BET_PROMPT)
+            writer.write(("\n".join(lines) + "\n").encode())
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int) -> None:
+    server = await asyncio.start_server(handle_connection, host, port)
+    print(f"Serving Blackjack on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+#
+# Pytests
+#
+
+
+def test_table_hand():
+    """Test a hand is dealt, played and settled through handle()."""
+    table = Table()
+    assert table.handle("hit")[-1] == BET_PROMPT
+    assert table.handle("bet 500")[0] == "You are too poor for that bet."
+
+    lines = table.handle("bet 10")
+    while lines[-1] == ACTION_PROMPT:
+        lines = table.handle("stay")
+    assert not table.in_hand
+    assert table.game.money in (90, 100, 110)
+
+
+def test_server_round_trip():
+    """Test a client can play a hand over TCP."""
+
+    async def play():
+        server = await asyncio.start_server(handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        async def response():
+            lines = []
+            while not lines or not lines[-1].startswith(PROMPT):
+                lines.append((await reader.readline()).decode().rstrip("\n"))
+            return lines
+
+        assert (await response())[-1] == BET_PROMPT
+        writer.write(b"bet 5\n")
+        lines = await response()
+        while lines[-1] == ACTION_PROMPT:
+            writer.write(b"stay\n")
+            lines = await response()
+        assert lines[-1] == BET_PROMPT
+
+        writer.write(b"quit\n")
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(play())
+
+
+#
+# End Pytests
+#
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Blackjack table server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8021)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.host, args.port))
@@ -0,0 +1,280 @@
+import random
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import blackjack
+import cards
+import strategy as strategies
+
+# per card code: points with Aces as 1, is an Ace, and the DecisionTable upcard index
+POINTS = cards.CARD_POINTS
+ACES = tuple(rank == 1 for rank in cards.CARD_RANKS)
+UPCARD_INDEXES = tuple(strategies.UPCARD_INDEX[card.value] for card in cards.CARDS)
+
+SimulationResult = namedtuple(
+    "SimulationResult",
+    ["hands", "wins", "losses", "draws", "bankroll", "ev", "variance"],
+)
+
+
+class HeadlessBlackjack(blackjack.Blackjack):
+    """Blackjack without any input() or print(), for playing hands in bulk.
+
+    Uses the same deal, hit, dealer and betting rules as the interactive game.
+    """
+
+    def play_hand(self, strategy: Callable) -> int:
+        """Play one hand to the end and settle the bet.
+
+        Args:
+            strategy [Callable]: strategy.Strategy or any callable taking the game, returns
+            True to hit and False to stay.
+
+        Returns 1 if the player won, -1 if the player lost and 0 for a draw.
+        """
+        self.game_over = False
+        self.deal()
+
+        while not self.game_over:
+            if strategy(self):
+                self.player_hit()
+            else:
+                self.dealer_hit()
+
+        result = blackjack.hand_result(self.player_points, self.dealer_points)
+        if result:
+            self.calc_bet(win=result > 0)
+        return result
+
+    def play_table(self, hands: int, table: bytearray, record: Callable) -> tuple:
+        """Play hands with a table strategy on card codes, without building the hands.
+
+        Deals the same cards in the same order as play_hand(), and uses the same rules:
+        blackjack.hand_points(), dealer_plays(), dealer_hits(), hand_result() and calc_bet().
+        Hands are kept as running hard totals plus an Ace flag looked up per card code.
+
+        Args:
+            hands [int]: number of hands to play
+            table [bytearray]: strategy.Strategy.table
+            record [Callable]: called with the money after every hand
+
+        Returns (wins, losses).
+        """
+        deal, start_round = self.deck.deal, self.deck.start_round
+        hand_points, hand_result = blackjack.hand_points, blackjack.hand_result
+        dealer_plays, dealer_hits = blackjack.dealer_plays, blackjack.dealer_hits
+        calc_bet = self.calc_bet
+        wins = losses = 0
+        for _ in range(hands):
+            start_round()
+            d1, d2 = deal(2)
+            p1, p2 = deal(2)
+            dealer_hard, dealer_ace = POINTS[d1] + POINTS[d2], ACES[d1] or ACES[d2]
+            player_hard, player_ace = POINTS[p1] + POINTS[p2], ACES[p1] or ACES[p2]
+            dealer = hand_points(dealer_hard, dealer_ace)
+            player = hand_points(player_hard, player_ace)
+            upcard = UPCARD_INDEXES[d1]
+
+            while player <= 21:
+                soft = player != player_hard
+                if (
+                    dealer_plays(player, dealer)
+                    or not table[(player * 2 + soft) * 10 + upcard]
+                ):
+                    # stay, as in dealer_hit()
+                    while dealer_hits(player, dealer):
+                        (card,) = deal(1)
+                        dealer_hard += POINTS[card]
+                        dealer_ace = dealer_ace or ACES[card]
+                        dealer = hand_points(dealer_hard, dealer_ace)
+                    break
+                (card,) = deal(1)
+                player_hard += POINTS[card]
+                player_ace = player_ace or ACES[card]
+                player = hand_points(player_hard, player_ace)
+
+            result = hand_result(player, dealer)
+            if result:
+                calc_bet(win=result > 0)
+                if result > 0:
+                    wins += 1
+                else:
+                    losses += 1
+            record(self.money)
+
+        return wins, losses
+
+
+def simulate(
+    hands: int, strategy: Callable, bet: int = 1, game: HeadlessBlackjack = None
+) -> SimulationResult:
+    """Play a number of hands with a fixed bet and return the aggregate results.
+
+    Args:
+        hands [int]: number of hands to play
+        strategy [Callable]: see HeadlessBlackjack.play_hand()
+        bet [int]: bet placed on every hand. The bankroll is allowed to go negative.
+        game [HeadlessBlackjack]: game to play on, a new one dealing from a 6 deck Shoe if
+        not supplied
+
+    Strategies with a `table` are played by HeadlessBlackjack.play_table(), the rest one
+    hand at a time through play_hand().
+
+    Returns SimulationResult, with the bankroll after every hand, and the EV and variance of
+    the money won per hand.
+    """
+    game = game or HeadlessBlackjack(cards.Shoe())
+    game.bet = bet
+    bankroll = array("q")
+
+    table = getattr(strategy, "table", None)
+    if table is not None:
+        wins, losses = game.play_table(hands, table, bankroll.append)
+        return _result(hands, wins, losses, bet, bankroll)
+
+    counts = {1: 0, -1: 0, 0: 0}
+    # skip the attribute lookups on every hand
+    play_hand, record = game.play_hand, bankroll.append
+    for _ in range(hands):
+        counts[play_hand(strategy)] += 1
+        record(game.money)
+
+    return _result(hands, counts[1], counts[-1], bet, bankroll)
+
+
+def _result(
+    hands: int, wins: int, losses: int, bet: int, bankroll: array
+) -> SimulationResult:
+    """Build the SimulationResult. Every hand wins or loses the bet, or draws, so the EV
+    and variance follow exactly from the counts."""
+    ev, variance = 0.0, 0.0
+    if hands:
+        ev = (wins - losses) * bet / hands
+        variance = (wins + losses) * bet * bet / hands - ev * ev
+    return SimulationResult(
+        hands=hands,
+        wins=wins,
+        losses=losses,
+        draws=hands - wins - losses,
+        bankroll=bankroll,
+        ev=ev,
+        variance=variance,
+    )
+
+
+def _simulate_shard(
+    hands: int, strategy: Callable, bet: int, seed: str
+) -> SimulationResult:
+    """Worker process entry point: play one shard on its own seeded Shoe."""
+    game = HeadlessBlackjack(cards.Shoe(rng=random.Random(seed)))
+    return simulate(hands, strategy, bet, game)
+
+
+def simulate_parallel(
+    hands: int, strategy: Callable, seed: int, workers: int = 4, bet: int = 1
+) -> SimulationResult:
+    """Split the hands across a process pool and merge the results.
+
+    Each shard gets its own random.Random seeded with the string "<seed>:<shard>", which is
+    hashed with SHA-512, so shards draw independent streams. Results are merged in shard
+    order, so the output only depends on the seed and the number of workers.
+
+    Args:
+        hands [int]: total number of hands to play
+        strategy [Callable]: see HeadlessBlackjack.play_hand(), must be picklable
+        seed [int]: base seed
+        workers [int]: number of processes, and of shards
+        bet [int]: bet placed on every hand
+
+    Returns SimulationResult as for simulate(). The bankroll joins the shards one after
+    the other, starting from the same $100.
+    """
+    shard_hands = [hands // workers + (i < hands % workers) for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        shards = list(
+            executor.map(
+                _simulate_shard,
+                shard_hands,
+                [strategy] * workers,
+                [bet] * workers,
+                [f"{seed}:{i}" for i in range(workers)],
+            )
+        )
+
+    bankroll = array("q")
+    for shard in shards:
+        offset = bankroll[-1] - 100 if bankroll else 0
+        bankroll.extend(money + offset for money in shard.bankroll)
+
+    return _result(
+        hands,
+        sum(shard.wins for shard in shards),
+        sum(shard.losses for shard in shards),
+        bet,
+        bankroll,
+    )
+
+
+#
+# Pytests
+#
+
+
+def test_simulate_counts():
+    """Test every hand is counted once and the bankroll matches the results."""
+    result = simulate(1000, strategies.HitBelow(17), bet=10)
+    assert result.wins + result.losses + result.draws == 1000
+    assert len(result.bankroll) == 1000
+    assert result.bankroll[-1] == 100 + 10 * (result.wins - result.losses)
+    assert result.ev == (result.bankroll[-1] - 100) / 1000
+
+
+def test_play_table():
+    """Test table strategies play exactly the same hands as play_hand()."""
+    for strategy in (strategies.HitBelow(17), strategies.HitBelow(22)):
+        fast = HeadlessBlackjack(cards.Shoe(decks=2, rng=random.Random(5)))
+        slow = HeadlessBlackjack(cards.Shoe(decks=2, rng=random.Random(5)))
+        expected = simulate(3000, lambda game: strategy(game), 5, slow)
+        assert simulate(3000, strategy, 5, fast) == expected
+        assert (fast.money, fast.money_lost) == (slow.money, slow.money_lost)
+
+
+def test_always_hit():
+    """Test hitting on everything only stops on 21 or a bust."""
+    game = HeadlessBlackjack()
+    for _ in range(200):
+        game.play_hand(lambda game: True)
+        assert game.player_points >= 21
+
+
+def test_no_repeated_cards():
+    """Test no hand holds more copies of a card than the shoe has decks, including hands
+    dealt across the cut card or the end of the shoe."""
+    for decks in (1, 2):
+        game = HeadlessBlackjack(cards.Shoe(decks=decks, rng=random.Random(decks)))
+        for i in range(5000):
+            game.play_hand(strategies.HitBelow(12 + i % 10))
+            dealt = game.player_hand + game.dealer_hand
+            assert max(map(dealt.count, dealt)) <= decks
+
+
+def test_simulate_parallel():
+    """Test the same seed and worker count give identical results."""
+    first = simulate_parallel(2001, strategies.HitBelow(17), seed=7, workers=2, bet=5)
+    second = simulate_parallel(2001, strategies.HitBelow(17), seed=7, workers=2, bet=5)
+    assert first == second
+    assert first.wins + first.losses + first.draws == 2001
+    assert first.bankroll[-1] == 100 + 5 * (first.wins - first.losses)
+
+
+#
+# End Pytests
+#
+
+
+if __name__ == "__main__":
+    result = simulate_parallel(1_000_000, strategies.HitBelow(17), seed=0)
+    print(f"Wins: {result.wins}, Losses: {result.losses}, Draws: {result.draws}")
+    print(f"EV per hand: {result.ev:.4f}, variance: {result.variance:.4f}")
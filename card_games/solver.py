@@ -0,0 +1,226 @@
+import hashlib
+import json
+from functools import lru_cache
+
+import blackjack
+import strategy
+
+# Bump when the game rules in blackjack.py change, to invalidate the cached tables
+RULES = "v1: dealer hits while behind the player, blackjack.hand_result() payouts"
+CACHE_FILE = "strategy_tables.json"
+
+# Shoe composition is a tuple of counts per point value: index 0 is Aces, 1-8 are 2-9,
+# 9 is every 10 point card. Upcards are indexed the same way, named as in strategy.UPCARDS.
+
+
+def shoe_counts(decks: int = 6) -> tuple:
+    """Return the composition of a full shoe."""
+    return (4 * decks,) * 9 + (16 * decks,)
+
+
+def _remove(counts: tuple, index: int) -> tuple:
+    return counts[:index] + (counts[index] - 1,) + counts[index + 1 :]
+
+
+class Solver:
+    """Expected values for the player's decisions, for a given shoe composition.
+
+    Uses the rules of blackjack.Blackjack: the dealer keeps hitting while behind the player
+    (dealer_hit), the player stands on 21 (_test_game_over), and hands are settled with
+    hand_result(). The values are approximate: a state is only known by its points, not its
+    cards, so the player's cards are never removed from the shoe. Each state is solved
+    against the composition left after the dealer's upcard, and every player draw is taken
+    from that same composition. The dealer's draws are removed from it card by card,
+    memoized on the remaining counts. This keeps the full table to a few seconds, and the
+    error is small for a multi-deck shoe.
+    """
+
+    def __init__(self, counts: tuple):
+        self.counts = counts
+        self._dealer = lru_cache(maxsize=None)(self._dealer)
+        self._stand = lru_cache(maxsize=None)(self._stand)
+        self._hit = lru_cache(maxsize=None)(self._hit)
+
+    def _dealer(self, hard: int, has_ace: bool, target: int, counts: tuple) -> dict:
+        """Return {final points: probability} for the dealer hitting up to the target."""
+        points = blackjack.hand_points(hard, has_ace)
+        if not blackjack.dealer_hits(target, points):
+            return {points: 1.0}
+
+        total = sum(counts)
+        final = {}
+        for i, n in enumerate(counts):
+            if n:
+                rest = _remove(counts, i)
+                for dealer_points, p in self._dealer(
+                    hard + i + 1, has_ace or i == 0, target, rest
+                ).items():
+                    final[dealer_points] = final.get(dealer_points, 0.0) + n / total * p
+        return final
+
+    def dealer_distribution(self, upcard: int, target: int, counts: tuple) -> dict:
+        """Return {final points: probability} for the dealer, after drawing the hole card.
+
+        Args:
+            upcard [int]: index of the upcard in the counts, 0 for an Ace
+            target [int]: player points the dealer hits up to
+            counts [tuple]: shoe composition, without the upcard
+        """
+        total = sum(counts)
+        final = {}
+        for i, n in enumerate(counts):
+            if n:
+                has_ace = upcard == 0 or i == 0
+                for dealer_points, p in self._dealer(
+                    upcard + i + 2, has_ace, target, _remove(counts, i)
+                ).items():
+                    final[dealer_points] = final.get(dealer_points, 0.0) + n / total * p
+        return final
+
+    def _stand(self, points: int, upcard: int) -> float:
+        return sum(
+            p * blackjack.hand_result(points, dealer_points)
+            for dealer_points, p in self.dealer_distribution(
+                upcard, points, _remove(self.counts, upcard)
+            ).items()
+        )
+
+    def _hit(self, hard: int, has_ace: bool, upcard: int) -> float:
+        """EV of hitting once, then playing the best of hit/stay from there on."""
+        counts = _remove(self.counts, upcard)
+        total = sum(counts)
+        ev = 0.0
+        for i, n in enumerate(counts):
+            if not n:
+                continue
+            new_hard, new_ace = hard + i + 1, has_ace or i == 0
+            points = blackjack.hand_points(new_hard, new_ace)
+            if points > 21:
+                value = -1.0
+            elif points == 21:
+                value = self._stand(21, upcard)
+            else:
+                value = max(
+                    self._stand(points, upcard), self._hit(new_hard, new_ace, upcard)
+                )
+            ev += n / total * value
+        return ev
+
+    def evs(self, points: int, soft: bool, upcard: int) -> tuple[float, float]:
+        """Return (stand EV, hit EV) per unit bet for the player state.
+
+        Args:
+            points [int]: player points
+            soft [bool]: True if an Ace is counting as 11
+            upcard [int]: index of the dealer's upcard, 0 for an Ace
+        """
+        hard = points - 10 if soft else points
+        return self._stand(points, upcard), self._hit(hard, soft, upcard)
+
+    def table(self) -> dict:
+        """Return the EVs for every decision state.
+
+        {"hard" | "soft": {points: {upcard: {"stand": EV, "hit": EV}}}}, with upcards named
+        as in strategy.UPCARDS. Hard totals run 4-21 and soft totals 12-21.
+        """
+        table = {"hard": {}, "soft": {}}
+        for soft, totals in ((False, range(4, 22)), (True, range(12, 22))):
+            for points in totals:
+                row = table["soft" if soft else "hard"][str(points)] = {}
+                for upcard, name in enumerate(strategy.UPCARDS):
+                    stand, hit = self.evs(points, soft, upcard)
+                    row[name] = {"stand": stand, "hit": hit}
+        return table
+
+
+def chart(table: dict) -> dict:
+    """Reduce a Solver table to the best action per state, "hit" or "stay"."""
+    return {
+        kind: {
+            points: {
+                upcard: "hit" if ev["hit"] > ev["stand"] else "stay"
+                for upcard, ev in row.items()
+            }
+            for points, row in rows.items()
+        }
+        for kind, rows in table.items()
+    }
+
+
+def solve(decks: int = 6, cache_file: str = CACHE_FILE) -> dict:
+    """Return the Solver table for a full shoe, cached on disk by rule set and shoe."""
+    counts = shoe_counts(decks)
+    key = hashlib.sha1(f"{RULES}|{counts}".encode()).hexdigest()
+
+    try:
+        with open(cache_file, "r") as f:
+            tables = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        tables = {}
+
+    if key not in tables:
+        tables[key] = Solver(counts).table()
+        with open(cache_file, "w") as f:
+            json.dump(tables, f)
+    return tables[key]
+
+
+#
+# Pytests
+#
+
+
+def test_dealer_distribution_sums_to_one():
+    """Test the dealer outcomes cover every possibility."""
+    solver = Solver(shoe_counts(1))
+    counts = _remove(solver.counts, 9)
+    for target in (12, 17, 21):
+        final = solver.dealer_distribution(9, target, counts)
+        assert abs(sum(final.values()) - 1) < 1e-9
+        assert min(final) >= target
+
+
+def test_dealer_distribution_known():
+    """Test a composition small enough to work out by hand: a 7 and a 10 left behind a 10
+    upcard. The hole card is the 10 (20, stays) or the 7 (17, hits on 18 and busts)."""
+    solver = Solver(shoe_counts(1))
+    counts = (0,) * 6 + (1, 0, 0, 1)
+    assert solver.dealer_distribution(9, 18, counts) == {20: 0.5, 27: 0.5}
+    assert solver.dealer_distribution(9, 17, counts) == {20: 0.5, 17: 0.5}
+
+
+def test_evs():
+    """Test the obvious decisions, and the EVs for a hand-worked composition."""
+    solver = Solver(shoe_counts(1))
+    stand, hit = solver.evs(21, False, 9)
+    assert stand > hit
+    stand, hit = solver.evs(5, False, 9)
+    assert hit > stand
+
+    # a 10 upcard with a 7 and a 10 behind it: standing on 18 wins against the 7 and loses
+    # against the 10, and any hit busts
+    solver = Solver((0,) * 6 + (1, 0, 0, 2))
+    assert solver.evs(18, False, 9) == (0.0, -1.0)
+
+
+def test_solve_cache(tmp_path):
+    """Test the table is written to and read back from the cache file."""
+    cache_file = str(tmp_path / "tables.json")
+    table = solve(1, cache_file)
+    assert solve(1, cache_file) == table
+    assert chart(table)["hard"]["21"]["10"] == "stay"
+
+
+#
+# End Pytests
+#
+
+
+if __name__ == "__main__":
+    for kind, rows in chart(solve()).items():
+        print(kind.capitalize())
+        print("\t" + "\t".join(strategy.UPCARDS))
+        for points, row in rows.items():
+            print(
+                points + "\t" + "\t".join(action[0].upper() for action in row.values())
+            )
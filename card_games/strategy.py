@@ -0,0 +1,153 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+
+import cards
+
+# dealer upcard index used by the charts: Ace is 0, 2-9 are 1-8, 10/Jack/Queen/King are 9
+UPCARDS = ("A", "2", "3", "4", "5", "6", "7", "8", "9", "10")
+UPCARD_INDEX = {value: min(rank, 10) - 1 for rank, value in enumerate(cards.VALUES, 1)}
+
+
+class Strategy(ABC):
+    """Hit/stay decision, used in place of the "Hit or stay?" prompt.
+
+    Strategies are called with the game while the hand is not over, and return True to hit
+    and False to stay.
+
+    Strategies that only look at the player's points, whether they are soft, and the dealer
+    upcard can also set `table`, laid out as in DecisionTable. simulate() then plays them
+    on card codes without building the hands.
+    """
+
+    table = None
+
+    @abstractmethod
+    def __call__(self, game) -> bool:
+        """Return True to hit and False to stay."""
+
+
+class HitBelow(Strategy):
+    """Hits while the player has less than the points given."""
+
+    def __init__(self, points: int):
+        self.points = points
+        # hit on every soft/hard total and upcard below the threshold
+        hits = min(max(points, 0), 32) * 2 * 10
+        self.table = bytearray(b"\x01" * hits) + bytearray(32 * 2 * 10 - hits)
+
+    def __call__(self, game) -> bool:
+        return game.player_points < self.points
+
+
+class DecisionTable(Strategy):
+    """Strategy compiled from a chart into a flat table, one lookup per decision.
+
+    A chart is {"hard" | "soft": {points: {upcard: "hit" | "stay"}}}, with upcards named as
+    in UPCARDS, as written by solver.chart(). States missing from the chart stay.
+    """
+
+    def __init__(self, chart: dict):
+        # indexed by (points * 2 + soft) * 10 + upcard
+        self.table = bytearray(32 * 2 * 10)
+        for kind, rows in chart.items():
+            soft = kind == "soft"
+            for points, row in rows.items():
+                for upcard, action in row.items():
+                    index = (int(points) * 2 + soft) * 10 + UPCARDS.index(upcard)
+                    self.table[index] = action.lower() in ("hit", "h")
+
+    @classmethod
+    def from_json(cls, filename: str) -> "DecisionTable":
+        """Load a chart saved as JSON."""
+        with open(filename, "r") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_csv(cls, filename: str) -> "DecisionTable":
+        """Load a chart saved as CSV, with a header of kind,points,A,2,...,10 and a row per
+        hard or soft total. Actions are hit/stay or H/S."""
+        chart = {}
+        with open(filename, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                kind, points = row.pop("kind"), row.pop("points")
+                chart.setdefault(kind, {})[points] = row
+        return cls(chart)
+
+    def __call__(self, game) -> bool:
+        hand = game.player_hand
+        return self.table[
+            (hand.points * 2 + hand.soft) * 10 + UPCARD_INDEX[game.dealer_hand[0].value]
+        ]
+
+
+def load_chart(filename: str) -> DecisionTable:
+    """Load a DecisionTable from a .csv or .json chart."""
+    if filename.endswith(".csv"):
+        return DecisionTable.from_csv(filename)
+    return DecisionTable.from_json(filename)
+
+
+#
+# Pytests
+#
+
+
+def _game(player: list, upcard: str):
+    """Minimal game state for calling a strategy."""
+    import blackjack
+
+    game = blackjack.Blackjack()
+    game.player_hand = blackjack.Hand(cards.Card(i, "Hearts") for i in player)
+    game.dealer_hand = [cards.Card(upcard, "Spades")]
+    game.player_points = game.player_hand.points
+    return game
+
+
+def test_decision_table():
+    """Test hard and soft totals and ten-valued upcards look up the right entry."""
+    table = DecisionTable(
+        {
+            "hard": {"16": {"10": "hit", "6": "stay"}},
+            "soft": {"17": {"A": "hit"}},
+        }
+    )
+    assert table(_game(["10", "6"], "King"))
+    assert not table(_game(["10", "6"], "6"))
+    assert table(_game(["Ace", "6"], "Ace"))
+    assert not table(_game(["Ace", "6", "10"], "Ace"))  # hard 17, not in chart
+
+
+def test_decision_table_csv(tmp_path):
+    """Test a CSV chart compiles to the same table as the JSON chart."""
+    filename = tmp_path / "chart.csv"
+    filename.write_text("kind,points,A,10\nhard,16,S,H\nsoft,18,H,S\n")
+    chart = {
+        "hard": {"16": {"A": "stay", "10": "hit"}},
+        "soft": {"18": {"A": "hit", "10": "stay"}},
+    }
+    assert load_chart(str(filename)).table == DecisionTable(chart).table
+
+
+def test_strategy_is_abstract():
+    """Test strategies must implement __call__."""
+    try:
+        Strategy()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("Strategy should be abstract")
+
+
+def test_hit_below():
+    """Test the threshold strategy, and that its table makes the same decisions."""
+    assert HitBelow(17)(_game(["10", "6"], "2"))
+    assert not HitBelow(17)(_game(["10", "7"], "2"))
+    for hand in (["10", "6"], ["10", "7"], ["Ace", "5"], ["Ace", "6"], ["2", "3"]):
+        game = _game(hand, "9")
+        assert DecisionTable.__call__(HitBelow(17), game) == HitBelow(17)(game)
+
+
+#
+# End Pytests
+#
@@ -24,7 +24,7 @@ def main(args):
         if event == "Submit":
             values = gui.return_dict_values()
 
-    pd_launches = pd.PDLaunchUpload(values)
+    pd_launches = pd.PDLaunchUpload(values, incremental=args.incremental)
     pd_launches.create_dfs_from_csv()
     pd_items, hold_items = pd_launches.return_uploads()
 
@@ -39,7 +39,10 @@ def main(args):
         print("\n".join(hold_items))
 
     if not args.test:
-        pd_launches.upload_dfs()
+        failed = pd_launches.upload_dfs()
+        for sheet_name, items in failed.items():
+            print(f"\nFailed to upload to {sheet_name}:")
+            print("\n".join(f"{item}: {error}" for item, error in items))
         if not args.no_gui:
             gui.final_window()
 
@@ -68,6 +71,12 @@ if __name__ == "__main__":
         action="store_true",
         help="Do not update JSON input after program run",
     )
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="Only check Smartsheet for Items not already uploaded by a previous run",
+    )
     args = parser.parse_args()
 
     main(args)
@@ -1,10 +1,43 @@
+import json
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import keyring
 import pandas as pd
 import smartsheet
 
+# Smartsheet recommends keeping bulk row operations to a few hundred rows per request
+UPLOAD_CHUNK_SIZE = 300
+
+# rows of the NetSuite export processed at a time
+CSV_CHUNK_SIZE = 20000
+
+# NetSuite exports m/d/yyyy, older exports and hand edits use m/d/yy or isoformat
+DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%Y-%m-%d")
+
+# cache of {sheet name: sheet id}, kept next to data.json
+SHEET_ID_FILE = "sheet_ids.json"
+
+# {sheet name: {Item: {"row_id": ..., "hash": ...}}} of every Item uploaded by this tool, or
+# found already on the sheet by an incremental run
+MANIFEST_FILE = "uploaded_items.json"
+
+# rows per request when reading the Item column
+SHEET_PAGE_SIZE = 5000
+
+# ids: {column title: column id}
+ColumnIndex = namedtuple("ColumnIndex", ["ids"])
+
 
 class PDLaunchUpload:
-    def __init__(self, data: dict) -> None:
+    def __init__(self, data: dict, incremental: bool = False) -> None:
+        """Load the config, and the active Items of both sheets.
+
+        In incremental mode the sheets, including the Sheet IDs, are only loaded once the CSV
+        contains Items that are new or changed since they were recorded in MANIFEST_FILE.
+        """
 
         self.pd_launch_sheet_name = data["pd_launches"]["smartsheet_name"]
         self.holds_sheet_name = data["holds"]["smartsheet_name"]
@@ -15,16 +48,50 @@ class PDLaunchUpload:
         self.csv_file = data["csv_file"]
         self.column_rename = data["rename_ns_columns"]
         self.date_columns = data["date_columns"]
+        self.sheet_id_ttl = data.get("sheet_id_cache_ttl_days", 7) * 86400
 
         self.ss_client = self._open_smartsheets()
-        pd_launch_sheet_id = self._get_sheet_id(self.pd_launch_sheet_name)
-        holds_sheet_id = self._get_sheet_id(self.holds_sheet_name)
-
-        self.pd_launch_ss = self.ss_client.Sheets.get_sheet(pd_launch_sheet_id)
-        self.holds_ss = self.ss_client.Sheets.get_sheet(holds_sheet_id)
-
-        self.pd_active_items = self._get_active_items(self.pd_launch_ss)
-        self.holds_active_items = self._get_active_items(self.holds_ss)
+        self._sheet_ids_lock = threading.Lock()
+
+        self.incremental = incremental
+        self.manifest = self._read_manifest()
+        self.sheets_loaded = False
+        if not incremental:
+            self._load_sheets()
+
+    def _load_sheets(self) -> None:
+        """Load the Sheet IDs, column indexes and active Items for both sheets."""
+        self.sheet_ids = self._read_sheet_ids()
+
+        # both sheets load concurrently, each only fetching its Item column
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            (
+                (self.pd_launch_sheet_id, self.pd_launch_columns, self.pd_active_items),
+                (self.holds_sheet_id, self.holds_columns, self.holds_active_items),
+            ) = executor.map(
+                self._load_sheet, (self.pd_launch_sheet_name, self.holds_sheet_name)
+            )
+        self.sheets_loaded = True
+
+    def _read_manifest(self) -> dict:
+        """Return the contents of MANIFEST_FILE, with an entry for both sheets."""
+        try:
+            with open(MANIFEST_FILE, "r") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = {}
+        for sheet_name in (self.pd_launch_sheet_name, self.holds_sheet_name):
+            manifest.setdefault(sheet_name, {})
+        return manifest
+
+    def _write_manifest(self) -> None:
+        with open(MANIFEST_FILE, "w") as f:
+            json.dump(self.manifest, f)
+
+    def _hash_rows(self, df: pd.DataFrame, ss_columns: list[str]) -> pd.Series:
+        """Return a content hash per row, over the columns uploaded to the sheet."""
+        columns = sorted(col_name for col_name in ss_columns if col_name in df.columns)
+        return pd.util.hash_pandas_object(df[columns], index=False).astype(str)
 
     def _open_smartsheets(self) -> smartsheet:
         """Initialize Smartsheets object."""
@@ -33,22 +100,82 @@ class PDLaunchUpload:
         ss_client.errors_as_exceptions(True)
         return ss_client
 
-    def _get_sheet_id(self, sheet_name: str) -> int:
-        """Return Sheet ID from Sheet Name."""
-        sheet_dict = self.ss_client.Sheets.list_sheets(include_all=True).to_dict()
-        for sheet in sheet_dict["data"]:
-            if sheet["name"].upper() == sheet_name.upper():
-                return sheet["id"]
+    def _read_sheet_ids(self) -> dict:
+        """Return {sheet name: sheet id} from SHEET_ID_FILE, listing the sheets if the file
+        is missing, malformed or older than the TTL."""
+        try:
+            with open(SHEET_ID_FILE, "r") as f:
+                cache = json.load(f)
+            updated, sheets = cache["updated"], cache["sheets"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+            return self._refresh_sheet_ids()
+
+        if time.time() - updated > self.sheet_id_ttl:
+            return self._refresh_sheet_ids()
+        return sheets
+
+    def _refresh_sheet_ids(self) -> dict:
+        """List every sheet once and rewrite SHEET_ID_FILE. Names are stored uppercase."""
+        with self._sheet_ids_lock:
+            sheet_dict = self.ss_client.Sheets.list_sheets(include_all=True).to_dict()
+            self.sheet_ids = {
+                sheet["name"].upper(): sheet["id"] for sheet in sheet_dict["data"]
+            }
+            with open(SHEET_ID_FILE, "w") as f:
+                json.dump({"updated": time.time(), "sheets": self.sheet_ids}, f)
+        return self.sheet_ids
+
+    def _get_sheet_id(self, sheet_name: str, refresh: bool = False) -> int:
+        """Return Sheet ID from Sheet Name, listing the sheets again if not cached."""
+        if refresh or sheet_name.upper() not in self.sheet_ids:
+            self._refresh_sheet_ids()
+        if sheet_name.upper() in self.sheet_ids:
+            return self.sheet_ids[sheet_name.upper()]
         raise NameError("Cannot find the specified Smartsheet")
 
-    def _get_active_items(self, sheet: smartsheet.models.Sheet) -> list:
-        """Return list of values from Item column. Used to filter incoming csv."""
-        return [
-            cell.value
-            for row in sheet.rows
-            for cell in row.cells
-            if cell.column_id == sheet.get_column_by_title("Item").id
-        ]
+    def _load_sheet(self, sheet_name: str) -> tuple[int, ColumnIndex, dict]:
+        """Return the Sheet ID, column index and active Items for the sheet.
+
+        If the cached Sheet ID is not found (e.g. the sheet was recreated), the sheets are
+        listed again and the load retried once.
+        """
+        sheet_id = self._get_sheet_id(sheet_name)
+        try:
+            columns = self._get_column_index(sheet_id)
+        except smartsheet.exceptions.ApiError as err:
+            if err.error.result.status_code != 404:
+                raise
+            sheet_id = self._get_sheet_id(sheet_name, refresh=True)
+            columns = self._get_column_index(sheet_id)
+        return sheet_id, columns, self._get_active_items(sheet_id, columns)
+
+    def _get_column_index(self, sheet_id: int) -> ColumnIndex:
+        """Build the column lookups once per sheet, without fetching any rows."""
+        sheet_columns = self.ss_client.Sheets.get_columns(sheet_id, include_all=True)
+        return ColumnIndex(
+            ids={column.title: column.id for column in sheet_columns.data}
+        )
+
+    def _get_active_items(self, sheet_id: int, columns: ColumnIndex) -> dict:
+        """Return {Item: row id} from the Item column. Used to filter incoming csv.
+
+        Only the Item column is requested, SHEET_PAGE_SIZE rows at a time, so the rest of
+        the sheet is never downloaded.
+        """
+        item_id = columns.ids["Item"]
+        active_items = {}
+        page = 1
+        while True:
+            sheet = self.ss_client.Sheets.get_sheet(
+                sheet_id, column_ids=[item_id], page_size=SHEET_PAGE_SIZE, page=page
+            )
+            for row in sheet.rows:
+                for cell in row.cells:
+                    if cell.column_id == item_id:
+                        active_items[cell.value] = row.id
+            if page * SHEET_PAGE_SIZE >= sheet.total_row_count:
+                return active_items
+            page += 1
 
     def _check_csv_columns(self, df: pd.DataFrame) -> None:
         """Check that SS_COLUMNS exist in DF as imported from csv.
@@ -59,71 +186,169 @@ class PDLaunchUpload:
             if col not in df_col_list:
                 raise ValueError(f"{col} not present in CSV import.")
 
+    def _get_csv_columns(self) -> pd.DataFrame:
+        """Return an empty, renamed DF of the CSV columns that are needed downstream.
+
+        Only the header is read. Everything not uploaded, date-parsed or used to route rows
+        is dropped, so the exports can grow without affecting the read.
+        """
+        header = pd.read_csv(self.csv_file, nrows=0, dtype=str)
+        header.rename(columns=self.column_rename, inplace=True)
+        needed = {
+            "Item",
+            "Description",
+            "Anticipated Launch Date",
+            *self.pd_ss_columns,
+            *self.hold_ss_columns,
+            *self.date_columns,
+        }
+        return header[[col for col in header.columns if col in needed]]
+
     def create_dfs_from_csv(self) -> None:
         """Import and drop unneeded columns from CSV, creates appropriately formatted DFs.
 
-        For Anticipated Launch Date, if any cells are not datetime, then the rows are moved to a Hold sheet.
+        The CSV is read as strings, CSV_CHUNK_SIZE rows at a time, and only the needed
+        columns are parsed. Each chunk is filtered and split on its own, so peak memory
+        does not depend on the size of the export.
         """
+        header = self._get_csv_columns()
+        self._check_csv_columns(header)
+        rename_back = {new: old for old, new in self.column_rename.items()}
+
+        reader = pd.read_csv(
+            self.csv_file,
+            usecols=[rename_back.get(col, col) for col in header.columns],
+            dtype=str,
+            keep_default_na=False,
+            chunksize=CSV_CHUNK_SIZE,
+        )
+        pd_dfs, hold_dfs = [header], [header]
+        for chunk in reader:
+            chunk.rename(columns=self.column_rename, inplace=True)
+            pd_df, hold_df = self._split_launches_and_holds(chunk)
+
+            if self.incremental:
+                pd_df = self._remove_unchanged(
+                    pd_df, self.pd_launch_sheet_name, self.pd_ss_columns
+                )
+                hold_df = self._remove_unchanged(
+                    hold_df, self.holds_sheet_name, self.hold_ss_columns
+                )
+            else:
+                pd_df, hold_df = self._remove_active(pd_df, hold_df)
+            pd_dfs.append(pd_df)
+            hold_dfs.append(hold_df)
+
+        pd_df, hold_df = pd.concat(pd_dfs), pd.concat(hold_dfs)
+        # only reconcile with Smartsheet if something changed since the last upload
+        if self.incremental and not (pd_df.empty and hold_df.empty):
+            self._load_sheets()
+
+            # Items already on the sheets, e.g. added by hand, are recorded too, so the next
+            # run can skip them without loading the sheets
+            self._record_active(
+                pd_df,
+                self.pd_launch_sheet_name,
+                self.pd_ss_columns,
+                self.pd_active_items,
+            )
+            self._record_active(
+                hold_df,
+                self.holds_sheet_name,
+                self.hold_ss_columns,
+                self.holds_active_items,
+            )
+            self._write_manifest()
+            pd_df, hold_df = self._remove_active(pd_df, hold_df)
+
+        self.pd_df = pd_df.reset_index()
+        self.hold_df = hold_df.reset_index()
+
+    def _remove_active(
+        self, pd_df: pd.DataFrame, hold_df: pd.DataFrame
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Remove rows already present on SS."""
+        return (
+            pd_df[~pd_df["Item"].isin(self.pd_active_items)],
+            hold_df[~hold_df["Item"].isin(self.holds_active_items)],
+        )
 
-        def convert_date(date: str) -> str:
-            """Specifically for Anticipated..., used to convert to isoformat.
-
-            Returns isoformatted string, unmodified date arg, or '202'. '202'
-            is specifically to 'mark' empty fields to be grouped with rows with valid datetimes for
-            uploading to the non-Hold sheet. In other words, the rows that get sent to the non-Hold sheet start with '202'.
+    def _record_active(
+        self,
+        df: pd.DataFrame,
+        sheet_name: str,
+        ss_columns: list[str],
+        active_items: dict,
+    ) -> None:
+        """Record the rows already on the sheet in the manifest, with their current hash."""
+        active = df[df["Item"].isin(active_items)]
+        hashes = self._hash_rows(active, ss_columns)
+        for item, row_hash in zip(active["Item"], hashes):
+            self.manifest[sheet_name][item] = {
+                "row_id": active_items[item],
+                "hash": row_hash,
+            }
+
+    def _remove_unchanged(
+        self, df: pd.DataFrame, sheet_name: str, ss_columns: list[str]
+    ) -> pd.DataFrame:
+        """Remove rows recorded in the manifest with the same content hash."""
+        uploaded = {
+            item: entry["hash"] for item, entry in self.manifest[sheet_name].items()
+        }
+        if not uploaded:
+            return df
+        unchanged = df["Item"].map(uploaded) == self._hash_rows(df, ss_columns)
+        return df[~unchanged]
+
+    def _split_launches_and_holds(
+        self, pd_df: pd.DataFrame
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Format a chunk of the CSV and split it into PD Launches and Holds DFs.
 
-            Fields that match '202' are returned to blanks after creating the non-Hold DF.
-            """
-            if date:
-                if "/" in date:
-                    # coerce to isoformat
-                    month, day, year = date.split("/")
-                    if len(year) == 2:
-                        year = "20" + year
-                    return f'{year}-{month.rjust(2, "0")}-{day.rjust(2, "0")}'
-                else:
-                    return date
-            return "202"  # used to return back to blank after hold_df removed, as in first 2 characters of datetime
+        For Anticipated Launch Date, if any cells are not datetime, then the rows are moved to a Hold sheet.
+        Blank Anticipated Launch Dates stay on the non-Hold sheet.
+        """
+        # drop rows with Items starting with 'BE1' amd ending with 'LC'
+        pd_df = pd_df[~pd_df["Item"].str.match("^BE1.*LC$")].copy()
 
-        pd_df = pd.read_csv(self.csv_file).fillna("")
-        pd_df.rename(columns=self.column_rename, inplace=True)
+        for date_field in self.date_columns:
+            pd_df[date_field] = self._format_dates(self._parse_dates(pd_df[date_field]))
 
-        self._check_csv_columns(pd_df)
+        launch_raw = pd_df["Anticipated Launch Date"]
+        launch_dates = self._parse_dates(launch_raw)
 
-        # drop rows with Items starting with 'BE1' amd ending with 'LC'
-        pd_df.drop(pd_df.index[pd_df["Item"].str.match("^BE1.*LC$")], inplace=True)
-
-        for date_field in (
-            "Earliest PO/WO Date",
-            "Design Approval Date",
-            "Date Photo Completed?",
-        ):
-            pd_df[date_field] = pd.to_datetime(
-                pd_df[date_field], errors="coerce", infer_datetime_format=True
-            )
-            pd_df[date_field] = pd_df[date_field].astype(str).replace({"NaT": ""})
+        # rows with a non-blank Anticipated Launch Date that is not a date go to holds
+        hold_mask = launch_dates.isna() & (launch_raw != "")
 
-        # convert and add to new column
-        pd_df["Anticipated Launch Date"] = pd_df["Anticipated Launch Date"].apply(
-            lambda x: convert_date(x)
+        # non-dates are left as-is for the Hold sheet
+        pd_df["Anticipated Launch Date"] = self._format_dates(launch_dates).where(
+            ~hold_mask, launch_raw
         )
 
-        # pull out rows that do not start with a '202', ie a date
-        hold_df = pd_df[~pd_df["Anticipated Launch Date"].str.startswith("202")]
-
         # if Description startswith 'runout' move to holds
-        runouts = pd_df[pd_df['Description'].str.match('runout.*', case=False)]
-        hold_df = pd.concat([hold_df, runouts])
+        runout_mask = pd_df["Description"].str.match("runout.*", case=False)
+
+        return pd_df[~hold_mask], pd_df[hold_mask | runout_mask]
 
-        # filter for rows with '202' and return '202' back to blank
-        pd_df = pd_df[pd_df["Anticipated Launch Date"].str.startswith("202")]
-        pd_df["Anticipated Launch Date"].replace("202", "", inplace=True)
+    def _parse_dates(self, dates: pd.Series) -> pd.Series:
+        """Parse a column of date strings, trying each of DATE_FORMATS in bulk.
+
+        Each format is only applied to the values still unparsed; anything left is NaT.
+        """
+        parsed = pd.to_datetime(dates, format=DATE_FORMATS[0], errors="coerce")
+        for date_format in DATE_FORMATS[1:]:
+            unparsed = parsed.isna() & (dates != "")
+            if not unparsed.any():
+                break
+            parsed[unparsed] = pd.to_datetime(
+                dates[unparsed], format=date_format, errors="coerce"
+            )
+        return parsed
 
-        # remove rows already present on SS
-        self.pd_df = pd_df[~pd_df["Item"].isin(self.pd_active_items)].reset_index()
-        self.hold_df = hold_df[
-            ~hold_df["Item"].isin(self.holds_active_items)
-        ].reset_index()
+    def _format_dates(self, dates: pd.Series) -> pd.Series:
+        """Return dates as isoformat strings, blanks for NaT."""
+        return dates.dt.strftime("%Y-%m-%d").fillna("")
 
     def return_uploads(self) -> tuple[list, list]:
         """Print the Items that will be uploaded to the PD Launches and Holds smartsheets."""
@@ -135,40 +360,122 @@ class PDLaunchUpload:
 
         return pd_items, hold_items
 
-    def upload_dfs(self) -> None:
-        """Iterates over csv dataframe and uploads to Smartsheets.
-
-        Adds one new Row at a time. Attemping to add a list of Rows gives error:
+    def _get_column_ids(self, columns: ColumnIndex, ss_columns: list[str]) -> dict:
+        """Return {column title: column id} for the supplied columns."""
+        for col_name in ss_columns:
+            if col_name not in columns.ids:
+                raise IndexError(f"{col_name} does not exist on sheet.")
+        return {col_name: columns.ids[col_name] for col_name in ss_columns}
+
+    def _create_rows(
+        self, df: pd.DataFrame, column_ids: dict
+    ) -> list[smartsheet.models.Row]:
+        """Convert the DF to new Smartsheet Rows, skipping empty cells."""
+        columns = [col_name for col_name in column_ids if col_name in df.columns]
+        rows = []
+        for record in df[columns].to_dict("records"):
+            rows.append(
+                self.ss_client.models.Row(
+                    {
+                        "toBottom": True,
+                        "cells": [
+                            {
+                                "columnId": column_ids[col_name],
+                                "value": value,
+                                "overrideValidation": True,
+                                "strict": False,
+                            }
+                            for col_name, value in record.items()
+                            if value  # can't append cells with empty values
+                        ],
+                    }
+                )
+            )
+        return rows
+
+    def _bulk_upload(
+        self,
+        sheet_name: str,
+        sheet_id: int,
+        columns: ColumnIndex,
+        df: pd.DataFrame,
+        ss_columns: list[str],
+    ) -> list[tuple[str, str]]:
+        """Upload the DF to the sheet in chunks of UPLOAD_CHUNK_SIZE rows.
+
+        Uses the partial success mode, so one bad row does not reject the whole chunk. The
+        rows that were added are recorded in MANIFEST_FILE after every chunk.
+
+        Returns list of (Item, error message) for the rows that were not added.
+        """
+        if df.empty:
+            return []
+
+        rows = self._create_rows(df, self._get_column_ids(columns, ss_columns))
+        items = df["Item"].tolist()
+        hashes = self._hash_rows(df, ss_columns).tolist()
+        failed = []
+        for start in range(0, len(rows), UPLOAD_CHUNK_SIZE):
+            chunk = rows[start : start + UPLOAD_CHUNK_SIZE]
+            try:
+                response = self.ss_client.Sheets.add_rows_with_partial_success(
+                    sheet_id, chunk
+                )
+            except smartsheet.exceptions.ApiError as err:
+                failed.extend(
+                    (item, str(err.error.result.message))
+                    for item in items[start : start + len(chunk)]
+                )
+                continue
+
+            failed_indexes = set()
+            for failure in response.failed_items or []:
+                failed_indexes.add(failure.index)
+                failed.append(
+                    (items[start + failure.index], str(failure.error.message))
+                )
+
+            # added rows are returned in request order, without the failed ones
+            added = [i for i in range(len(chunk)) if i not in failed_indexes]
+            for i, row in zip(added, response.result):
+                self.manifest[sheet_name][items[start + i]] = {
+                    "row_id": row.id,
+                    "hash": hashes[start + i],
+                }
+            self._write_manifest()
+        return failed
+
+    def upload_dfs(self) -> dict:
+        """Uploads the csv dataframes to Smartsheets.
+
+        Column IDs come from the index built when loading the sheets, and rows are added in
+        bulk, UPLOAD_CHUNK_SIZE per request. Each Row carries its own toBottom location
+        specifier; setting it as a plain attribute is not serialized for lists of Rows and
+        gives the error:
             'Invalid row location: You must use at least 1 location specifier'
-        even though toBottom is set.
 
         overrideValidation is set to True to allow for PickLists. Via API non-required conformity
         seems to be required.
-        """
 
-        def _create_and_upload(
-            sheet: smartsheet.models.Sheet, df: pd.DataFrame, ss_columns: list[str]
-        ):
-            """Helper function to perform the DF upload to Smartsheets."""
-            if not df.empty:
-                for index, row in df.iterrows():
-                    new_row = self.ss_client.models.Row()
-                    for col_name in ss_columns:
-                        if row.get(col_name):  # can't append cells with empty values
-                            sheet_col = sheet.get_column_by_title(col_name)
-                            if sheet_col:
-                                new_row.cells.append(
-                                    {
-                                        "column_id": sheet_col.id,
-                                        "value": row[col_name],
-                                        "overrideValidation": True,
-                                        "strict": False,
-                                    }
-                                )
-                            else:
-                                raise IndexError(f"{col_name} does not exist on sheet.")
-                    new_row.toBottom = True
-                    sheet.add_rows(new_row)
-
-        _create_and_upload(self.pd_launch_ss, self.pd_df, self.pd_ss_columns)
-        _create_and_upload(self.holds_ss, self.hold_df, self.hold_ss_columns)
+        Returns {sheet name: [(Item, error message)]} for any rows that failed to upload.
+        """
+        if self.pd_df.empty and self.hold_df.empty:
+            return {}
+
+        failed = {
+            self.pd_launch_sheet_name: self._bulk_upload(
+                self.pd_launch_sheet_name,
+                self.pd_launch_sheet_id,
+                self.pd_launch_columns,
+                self.pd_df,
+                self.pd_ss_columns,
+            ),
+            self.holds_sheet_name: self._bulk_upload(
+                self.holds_sheet_name,
+                self.holds_sheet_id,
+                self.holds_columns,
+                self.hold_df,
+                self.hold_ss_columns,
+            ),
+        }
+        return {name: items for name, items in failed.items() if items}
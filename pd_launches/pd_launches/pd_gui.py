@@ -13,6 +13,7 @@ class PDGUI:
         self.HOLDS_COLUMNS = "\n".join(data["holds"]["smartsheet_columns"])
         self.RENAME_NS_COLUMNS = data["rename_ns_columns"]
         self.DATEFIELDS = data["date_columns"]
+        self.SHEET_ID_TTL = data.get("sheet_id_cache_ttl_days", 7)
 
     def create_gui(self) -> str:
 
@@ -76,6 +77,7 @@ class PDGUI:
             },
             "date_columns": self.DATEFIELDS,
             "rename_ns_columns": self.RENAME_NS_COLUMNS,
+            "sheet_id_cache_ttl_days": self.SHEET_ID_TTL,
         }
 
     def confirmation_gui(self, pd_items: list[str], hold_items: list[str]) -> None:
@@ -1,5 +1,257 @@
+import csv
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pandas
+import pytest
+import smartsheet
+
 from pd_launches import __version__
+from pd_launches import pd
+
+DATA_FILE = os.path.join(os.path.dirname(pd.__file__), "data.json")
 
 
 def test_version():
     assert __version__ == '0.1.0'
+
+
+class FakeSheets:
+    """Stands in for ss_client.Sheets, recording the name of every call.
+
+    sheets is {sheet name: {Item: row id}} of the Items already on each sheet, listed with
+    ids 0, 1, ... in order. Any other sheet id raises a 404 ApiError, as a deleted sheet does.
+    """
+
+    def __init__(self, data: dict, sheets: dict):
+        self.calls = []
+        self.names = list(sheets)
+        self.items = [dict(items) for items in sheets.values()]
+        self.columns = [
+            data["pd_launches"]["smartsheet_columns"],
+            data["holds"]["smartsheet_columns"],
+        ]
+        self.added = [[], []]
+        self.fail = set()
+
+    def list_sheets(self, include_all):
+        self.calls.append("list_sheets")
+        data = [{"name": name, "id": i} for i, name in enumerate(self.names)]
+        return SimpleNamespace(to_dict=lambda: {"data": data})
+
+    def get_columns(self, sheet_id, include_all):
+        self.calls.append("get_columns")
+        if sheet_id not in range(len(self.names)):
+            error = SimpleNamespace(result=SimpleNamespace(status_code=404))
+            raise smartsheet.exceptions.ApiError(error, "Not Found")
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(title=title, id=column_id)
+                for column_id, title in enumerate(self.columns[sheet_id])
+            ]
+        )
+
+    def get_sheet(self, sheet_id, column_ids, page_size, page):
+        self.calls.append("get_sheet")
+        items = list(self.items[sheet_id].items())
+        rows = [
+            SimpleNamespace(
+                id=row_id, cells=[SimpleNamespace(column_id=column_ids[0], value=item)]
+            )
+            for item, row_id in items[(page - 1) * page_size : page * page_size]
+        ]
+        return SimpleNamespace(rows=rows, total_row_count=len(items))
+
+    def add_rows_with_partial_success(self, sheet_id, rows):
+        """Add the rows, failing those whose Item is in self.fail, and return the new row
+        ids in request order."""
+        self.calls.append("add_rows_with_partial_success")
+        item_id = self.columns[sheet_id].index("Item")
+        failed_items, result = [], []
+        for index, row in enumerate(rows):
+            item = next(cell.value for cell in row.cells if cell.column_id == item_id)
+            if item in self.fail:
+                error = SimpleNamespace(message=f"{item} rejected")
+                failed_items.append(SimpleNamespace(index=index, error=error))
+                continue
+            self.added[sheet_id].append(item)
+            result.append(
+                SimpleNamespace(id=1000 * (sheet_id + 1) + len(self.added[sheet_id]))
+            )
+        return SimpleNamespace(failed_items=failed_items, result=result)
+
+
+def _row(item, description="Rae Ring", launch="", **dates):
+    return {
+        "Name": item,
+        "Description": description,
+        "Anticipated Launch Date": launch,
+        **dates,
+    }
+
+
+@pytest.fixture
+def launch(tmp_path, monkeypatch):
+    """Return make(rows, incremental=False, active=None) -> (PDLaunchUpload, FakeSheets).
+
+    rows are written to a NetSuite-style CSV, and active is {sheet name: {Item: row id}}.
+    Files are written to tmp_path.
+    """
+    monkeypatch.chdir(tmp_path)
+    with open(DATA_FILE, "r") as f:
+        data = json.load(f)
+    data["csv_file"] = str(tmp_path / "export.csv")
+    names = [data["pd_launches"]["smartsheet_name"], data["holds"]["smartsheet_name"]]
+
+    def make(rows, incremental=False, active=None):
+        columns = {"Name", "Date Photo Completed"}
+        columns.update(
+            col for col in data["pd_launches"]["smartsheet_columns"] if col != "Item"
+        )
+        columns.discard("Date Photo Completed?")
+        with open(data["csv_file"], "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=sorted(columns), restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+
+        sheets = FakeSheets(
+            data, {name: (active or {}).get(name, {}) for name in names}
+        )
+        client = SimpleNamespace(Sheets=sheets, models=smartsheet.models)
+        monkeypatch.setattr(pd.PDLaunchUpload, "_open_smartsheets", lambda self: client)
+        upload = pd.PDLaunchUpload(
+            json.loads(json.dumps(data)), incremental=incremental
+        )
+        return upload, sheets
+
+    return make
+
+
+def test_parse_dates(launch):
+    """Test m/d/yyyy, m/d/yy and iso dates parse to the same day, and the rest to NaT."""
+    upload, _ = launch([])
+    dates = pandas.Series(["1/2/2023", "01/02/23", "2023-01-02", "", "TBD"])
+    formatted = upload._format_dates(upload._parse_dates(dates))
+    assert formatted.tolist() == ["2023-01-02"] * 3 + ["", ""]
+
+
+def test_split_launches_and_holds(launch):
+    """Test blank launch dates stay on PD Launches, non-dates and runouts go to Holds,
+    and BE1...LC Items are dropped."""
+    upload, _ = launch(
+        [
+            _row("BE100", launch="3/4/23", **{"Earliest PO/WO Date": "3/1/2023"}),
+            _row("BE101"),
+            _row("BE102", launch="TBD"),
+            _row("BE103", "Runout Rae Ring", launch="2023-03-04"),
+            _row("BE104", "runout ring", launch="On hold"),
+            _row("BE105LC", launch="3/4/23"),
+            _row("BE1LC"),
+        ]
+    )
+    upload.create_dfs_from_csv()
+    pd_df, hold_df = upload.pd_df.set_index("Item"), upload.hold_df.set_index("Item")
+
+    assert pd_df.index.tolist() == ["BE100", "BE101", "BE103"]
+    assert hold_df.index.tolist() == ["BE102", "BE103", "BE104"]
+
+    assert pd_df.loc["BE100", "Anticipated Launch Date"] == "2023-03-04"
+    assert pd_df.loc["BE100", "Earliest PO/WO Date"] == "2023-03-01"
+    assert pd_df.loc["BE101", "Anticipated Launch Date"] == ""
+    assert hold_df.loc["BE102", "Anticipated Launch Date"] == "TBD"
+    assert hold_df.loc["BE103", "Anticipated Launch Date"] == "2023-03-04"
+    assert hold_df.loc["BE104", "Anticipated Launch Date"] == "On hold"
+
+
+def test_chunked_read(launch, monkeypatch):
+    """Test reading the CSV in chunks gives the same DFs as reading it at once."""
+    rows = [
+        _row(f"BE{i}", "Runout" if i % 5 == 0 else "Ring", launch)
+        for i, launch in enumerate(["1/2/23", "", "TBD", "2023-01-02", "1/2/2023"] * 3)
+    ]
+    upload, _ = launch(rows)
+    upload.create_dfs_from_csv()
+    whole = upload.pd_df, upload.hold_df
+
+    monkeypatch.setattr(pd, "CSV_CHUNK_SIZE", 4)
+    upload.create_dfs_from_csv()
+    pandas.testing.assert_frame_equal(upload.pd_df, whole[0])
+    pandas.testing.assert_frame_equal(upload.hold_df, whole[1])
+
+
+def test_incremental_rerun(launch):
+    """Test a second incremental run with the same CSV makes no Smartsheet calls, including
+    for Items that were already on the sheet before the first run."""
+    pd_sheet = "New PD Launches"
+    rows = [_row("BE100", launch="1/2/23"), _row("BE101"), _row("BE102", launch="TBD")]
+
+    upload, sheets = launch(rows, incremental=True, active={pd_sheet: {"BE100": 7}})
+    assert sheets.calls == []
+    upload.create_dfs_from_csv()
+    assert upload.return_uploads() == (["BE101"], ["BE102"])
+    assert upload.upload_dfs() == {}
+    assert "list_sheets" in sheets.calls
+    assert upload.manifest[pd_sheet]["BE100"]["row_id"] == 7
+
+    upload, sheets = launch(rows, incremental=True, active={pd_sheet: {"BE100": 7}})
+    upload.create_dfs_from_csv()
+    assert upload.return_uploads() == ([], [])
+    assert upload.upload_dfs() == {}
+    assert sheets.calls == []
+
+
+def _write_sheet_ids(sheets, age_days=0):
+    with open(pd.SHEET_ID_FILE, "w") as f:
+        json.dump({"updated": time.time() - age_days * 86400, "sheets": sheets}, f)
+
+
+def test_sheet_id_cache(launch):
+    """Test cached Sheet IDs are used until the TTL, and listed again once it expires."""
+    _write_sheet_ids({"NEW PD LAUNCHES": 0, "ROS AND HOLDS": 1})
+    upload, sheets = launch([])
+    assert sheets.calls.count("list_sheets") == 0
+    assert (upload.pd_launch_sheet_id, upload.holds_sheet_id) == (0, 1)
+
+    _write_sheet_ids({"NEW PD LAUNCHES": 0, "ROS AND HOLDS": 1}, age_days=8)
+    upload, sheets = launch([])
+    assert sheets.calls.count("list_sheets") == 1
+    with open(pd.SHEET_ID_FILE, "r") as f:
+        assert time.time() - json.load(f)["updated"] < 60
+
+
+def test_sheet_id_missing_name(launch):
+    """Test a sheet missing from the cache lists the sheets once."""
+    _write_sheet_ids({"NEW PD LAUNCHES": 0})
+    upload, sheets = launch([])
+    assert sheets.calls.count("list_sheets") == 1
+    assert upload.holds_sheet_id == 1
+
+
+def test_sheet_id_stale(launch):
+    """Test a cached Sheet ID that 404s is listed again and the load retried once."""
+    _write_sheet_ids({"NEW PD LAUNCHES": 0, "ROS AND HOLDS": 7})
+    upload, sheets = launch([], active={"ROs and Holds": {"BE100": 3}})
+    assert sheets.calls.count("list_sheets") == 1
+    assert sheets.calls.count("get_columns") == 3
+    assert upload.holds_sheet_id == 1
+    assert upload.holds_active_items == {"BE100": 3}
+
+
+def test_bulk_upload_chunks(launch, monkeypatch):
+    """Test rows are added UPLOAD_CHUNK_SIZE at a time, a failed row is reported by Item,
+    and the added rows are recorded against the row ids returned for them."""
+    monkeypatch.setattr(pd, "UPLOAD_CHUNK_SIZE", 4)
+    items = [f"BE{i}" for i in range(100, 110)]
+    upload, sheets = launch([_row(item) for item in items])
+    sheets.fail.add("BE105")
+    upload.create_dfs_from_csv()
+
+    pd_sheet = "New PD Launches"
+    assert upload.upload_dfs() == {pd_sheet: [("BE105", "BE105 rejected")]}
+    assert sheets.calls.count("add_rows_with_partial_success") == 3
+    assert sheets.added[0] == [item for item in items if item != "BE105"]
+    assert {
+        item: entry["row_id"] for item, entry in upload.manifest[pd_sheet].items()
+    } == {item: 1001 + i for i, item in enumerate(sheets.added[0])}